@@ -0,0 +1,619 @@
+import numpy as np
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import matplotlib.pyplot as plt
+import helpers as helpers
+import convex_hull as convex_hull
+import kd_tree as kd_tree
+import delaunay as delaunay
+import linprog as linprog
+import workloads as workloads
+
+# Run <function>(*args) <repeats> times and return the best elapsed time in seconds
+def best_time(function, *args, repeats=3):
+    best = float('inf')
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+# Compare monotone_chain on a PointSet with grahams_scan on the same points as Point2D objects
+# grahams_scan is only timed up to <max_grahams_size> points, since it gets too slow after that
+def benchmark_monotone_chain(sizes=(10**3, 10**4, 10**5, 10**6, 10**7), max_grahams_size=10**5, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+
+    print(f"{'N':>10} {'grahams_scan':>14} {'monotone_chain':>16} {'speedup':>9}")
+
+    for size in sizes:
+        point_set = helpers.PointSet(rng.uniform(0.0, 50.0, size=(size, 2)))
+        monotone_chain_elapsed = best_time(convex_hull.monotone_chain, point_set)
+
+        if size <= max_grahams_size:
+            points = point_set.to_points()
+            grahams_scan_elapsed = best_time(convex_hull.grahams_scan, points, repeats=1)
+            speedup = f"{grahams_scan_elapsed / monotone_chain_elapsed:8.1f}x"
+        else:
+            grahams_scan_elapsed = None
+            speedup = f"{'-':>9}"
+
+        grahams_scan_column = f"{grahams_scan_elapsed:14.4f}" if grahams_scan_elapsed is not None else f"{'-':>14}"
+        print(f"{size:>10} {grahams_scan_column} {monotone_chain_elapsed:16.4f} {speedup}")
+
+        results.append((size, grahams_scan_elapsed, monotone_chain_elapsed))
+
+    return results
+
+# Time every 2D hull algorithm with and without the Akl-Toussaint filter on uniform points
+# and report the share of points the filter discards
+def benchmark_akl_toussaint(size=10**4, shape='octagon', seed=0):
+    rng = np.random.default_rng(seed)
+    point_set = helpers.PointSet(rng.uniform(0.0, 50.0, size=(size, 2)))
+    algorithms = [("Graham's Scan", convex_hull.grahams_scan), ("Gift Wrapping", convex_hull.gift_wrapping),
+                  ("Divide and Conquer", convex_hull.divide_and_conquer), ("Quick Hull", convex_hull.quick_hull),
+                  ("Monotone Chain", convex_hull.monotone_chain)]
+    results = []
+
+    print(f"{'Algorithm':>20} {'plain':>10} {'culled':>10} {'discarded':>10}")
+
+    for name, algorithm in algorithms:
+        stats = {}
+        plain_elapsed = best_time(algorithm, point_set)
+        culled_elapsed = best_time(lambda: algorithm(point_set, cull=shape, stats=stats))
+        discarded = stats['discarded'] / size
+
+        print(f"{name:>20} {plain_elapsed:10.4f} {culled_elapsed:10.4f} {discarded:10.2%}")
+
+        results.append((name, plain_elapsed, culled_elapsed, discarded))
+
+    return results
+
+# Compare Chan's algorithm with gift wrapping, both on a small hull (uniform square)
+# and on a hull with every point as a vertex (points on a circle)
+def benchmark_chans_algorithm(sizes=(10**3, 3 * 10**3, 10**4), seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+
+    print(f"{'N':>10} {'input':>8} {'h':>7} {'gift_wrapping':>15} {'chans_algorithm':>17}")
+
+    for size in sizes:
+        angles = rng.uniform(0.0, 2 * np.pi, size)
+        inputs = [('square', rng.uniform(0.0, 50.0, size=(size, 2))),
+                  ('circle', 25.0 * np.column_stack((np.cos(angles), np.sin(angles))))]
+
+        for name, coords in inputs:
+            point_set = helpers.PointSet(coords)
+            points = point_set.to_points()
+
+            gift_wrapping_elapsed = best_time(convex_hull.gift_wrapping, points, repeats=1)
+            chans_algorithm_elapsed = best_time(convex_hull.chans_algorithm, point_set, repeats=1)
+            h = len(convex_hull.chans_algorithm(point_set))
+
+            print(f"{size:>10} {name:>8} {h:>7} {gift_wrapping_elapsed:15.4f} {chans_algorithm_elapsed:17.4f}")
+
+            results.append((size, name, h, gift_wrapping_elapsed, chans_algorithm_elapsed))
+
+    return results
+
+# Time divide_and_conquer on Point2D lists and on a PointSet, then run <threads> calls at once
+# over the same (read-only) PointSet and check that they all agree with the sequential result
+# and with monotone_chain, on each workload of <distributions> (see workloads.py)
+def benchmark_divide_and_conquer(sizes=(10**3, 10**4, 10**5), threads=8, distributions=('uniform', 'grid', 'collinear'), seed=0):
+    results = []
+
+    print(f"{'distribution':>14} {'N':>10} {'Point2D list':>14} {'PointSet':>10} {'threads':>10} {'consistent':>11}")
+
+    for distribution in distributions:
+        for size in sizes:
+            point_set = workloads.generate_point_set(distribution, size, seed=seed)
+            points = point_set.to_points()
+
+            list_elapsed = best_time(convex_hull.divide_and_conquer, points)
+            point_set_elapsed = best_time(convex_hull.divide_and_conquer, point_set)
+
+            expected = convex_hull.divide_and_conquer(point_set).tolist()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                start = time.perf_counter()
+                hulls = list(executor.map(lambda _: convex_hull.divide_and_conquer(point_set).tolist(), range(threads)))
+                threads_elapsed = time.perf_counter() - start
+
+            # Same hull from every thread, and the same vertices as monotone_chain
+            # (the 'grid' and 'collinear' workloads repeat and align points)
+            reference = point_set.coords[convex_hull.monotone_chain(point_set)].tolist()
+            consistent = all(hull == expected for hull in hulls) and \
+                sorted(point_set.coords[expected].tolist()) == sorted(reference)
+
+            print(f"{distribution:>14} {size:>10} {list_elapsed:14.4f} {point_set_elapsed:10.4f} {threads_elapsed:10.4f} {str(consistent):>11}")
+
+            results.append((distribution, size, list_elapsed, point_set_elapsed, threads_elapsed, consistent))
+
+    return results
+
+# Average time of an insert and a delete on a DynamicConvexHull of <size> points, against
+# recomputing the hull from scratch with quick_hull after each update
+def benchmark_dynamic_hull(sizes=(10**3, 10**4, 10**5), updates=200, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+
+    print(f"{'N':>10} {'dynamic update':>16} {'quick_hull':>12}")
+
+    for size in sizes:
+        points = helpers.PointSet(rng.uniform(0.0, 50.0, size=(size, 2))).to_points()
+        new_points = helpers.PointSet(rng.uniform(-5.0, 55.0, size=(updates, 2))).to_points()
+        dynamic_hull = convex_hull.DynamicConvexHull(points)
+
+        start = time.perf_counter()
+        for point in new_points:
+            dynamic_hull.insert(point)
+        for point in new_points:
+            dynamic_hull.delete(point)
+        dynamic_elapsed = (time.perf_counter() - start) / (2 * updates)
+
+        quick_hull_elapsed = best_time(convex_hull.quick_hull, points + new_points[:1])
+
+        print(f"{size:>10} {dynamic_elapsed:16.6f} {quick_hull_elapsed:12.6f}")
+
+        results.append((size, dynamic_elapsed, quick_hull_elapsed))
+
+    return results
+
+# Hulls of <groups> clusters of <min_size> to <max_size> points: one batch_hull call against
+# a loop of quick_hull and monotone_chain calls, one per cluster
+def benchmark_batch_hull(groups=10**4, size_ranges=((10, 100), (100, 1000)), seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+
+    print(f"{'sizes':>12} {'points':>10} {'batch_hull':>12} {'quick_hull':>12} {'monotone_chain':>16}")
+
+    for min_size, max_size in size_ranges:
+        sizes = rng.integers(min_size, max_size + 1, groups)
+        offsets = np.concatenate(([0], np.cumsum(sizes)))
+        coords = rng.normal(0.0, 10.0, size=(offsets[-1], 2))
+        clusters = [helpers.PointSet(coords[offsets[g]:offsets[g + 1]]) for g in range(groups)]
+
+        batch_elapsed = best_time(convex_hull.batch_hull, coords, offsets)
+        loop_elapsed = [best_time(lambda: [algorithm(cluster) for cluster in clusters], repeats=1)
+                        for algorithm in (convex_hull.quick_hull, convex_hull.monotone_chain)]
+
+        print(f"{f'{min_size}-{max_size}':>12} {offsets[-1]:>10} {batch_elapsed:12.4f} {loop_elapsed[0]:12.4f} {loop_elapsed[1]:16.4f}")
+
+        results.append(((min_size, max_size), batch_elapsed, *loop_elapsed))
+
+    return results
+
+# Time the orientation predicate on the triples of consecutive points of each workload of
+# <distributions>, and the hull algorithms built on it. On the 'grid' and 'collinear' points most
+# orientations are too close to 0 for the float filter, so this times the exact stage
+def benchmark_orientation(size=10**6, distributions=('uniform', 'grid', 'collinear'), seed=0):
+    results = []
+
+    print(f"{'distribution':>14} {'uncertain':>10} {'ccw_xy':>10} {'monotone_chain':>16} {'quick_hull':>12} {'divide_and_conquer':>20}")
+
+    for distribution in distributions:
+        coords = workloads.generate(distribution, size, seed=seed)
+        point_set = helpers.PointSet(coords)
+        x, y = coords[:, 0], coords[:, 1]
+        triples = (x, y, np.roll(x, -1), np.roll(y, -1), np.roll(x, -2), np.roll(y, -2))
+
+        det_left = (triples[0] - triples[4]) * (triples[3] - triples[5])
+        det_right = (triples[1] - triples[5]) * (triples[2] - triples[4])
+        uncertain = float(np.mean(np.abs(det_left - det_right) < helpers.CCW_ERROR_BOUND * np.abs(det_left + det_right)))
+
+        ccw_elapsed = best_time(helpers.ccw_xy, *triples)
+        hull_elapsed = [best_time(algorithm, point_set, repeats=1)
+                        for algorithm in (convex_hull.monotone_chain, convex_hull.quick_hull, convex_hull.divide_and_conquer)]
+
+        print(f"{distribution:>14} {uncertain:10.3f} {ccw_elapsed:10.4f} {hull_elapsed[0]:16.4f} {hull_elapsed[1]:12.4f} {hull_elapsed[2]:20.4f}")
+
+        results.append((distribution, uncertain, ccw_elapsed, *hull_elapsed))
+
+    return results
+
+# Build a KD-tree over uniform points with each leaf size and time range queries (squares
+# holding each fraction <selectivities> of the points, through investigate_indices), as the
+# latency per query in milliseconds. Small leaves mean more Python steps per query, large
+# leaves testing more points outside of the query
+def benchmark_kd_tree_leaf_size(size=10**6, leaf_sizes=(1, 4, 16, 64, 256), selectivities=(10**-5, 10**-4, 10**-3, 10**-2),
+                                queries=100, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform(0.0, 1.0, size=(size, 2))
+    point_set = helpers.PointSet(coords)
+
+    regions = {}
+    for selectivity in selectivities:
+        side = np.sqrt(selectivity)
+        corners = rng.uniform(0.0, 1.0 - side, size=(queries, 2))
+        regions[selectivity] = [[x, x + side, y, y + side] for x, y in corners.tolist()]
+
+    results = []
+
+    print(f"{'leaf size':>10} {'nodes':>10} {'build':>8}" + "".join(f" {f'{selectivity:g} (ms)':>14}" for selectivity in selectivities))
+
+    for leaf_size in leaf_sizes:
+        start = time.perf_counter()
+        tree = kd_tree.KDTree(point_set, leaf_size=leaf_size)
+        build_elapsed = time.perf_counter() - start
+
+        latencies = [1000 * best_time(lambda: [tree.investigate_indices(region) for region in regions[selectivity]]) / queries
+                     for selectivity in selectivities]
+
+        print(f"{leaf_size:>10} {len(tree.lows):>10} {build_elapsed:8.3f}" + "".join(f" {latency:14.4f}" for latency in latencies))
+
+        results.append((leaf_size, build_elapsed, *latencies))
+
+    return results
+
+# Time the build of a KDTree over uniform points with each number of coordinates in
+# <dimensions>, and its box queries and k-nearest neighbours, in milliseconds per query.
+# The boxes hold about <selectivity> of the points
+def benchmark_kd_tree_dimensions(size=10**6, dimensions=(1, 2, 3, 4), selectivity=10**-4, queries=200, k=10, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+
+    print(f"{'dimensions':>10} {'build (s)':>10} {'box (ms)':>10} {'knn (ms)':>10}")
+
+    for dimension in dimensions:
+        coords = rng.uniform(0.0, 1.0, size=(size, dimension))
+
+        start = time.perf_counter()
+        tree = kd_tree.KDTree(coords)
+        build_elapsed = time.perf_counter() - start
+
+        side = selectivity ** (1 / dimension)
+        corners = rng.uniform(0.0, 1.0 - side, size=(queries, dimension))
+        regions = np.stack((corners, corners + side), axis=2).reshape(queries, -1).tolist()
+        points = rng.uniform(0.0, 1.0, size=(queries, dimension)).tolist()
+
+        box_elapsed = best_time(lambda: [tree.investigate_indices(region) for region in regions]) / queries
+        knn_elapsed = best_time(lambda: [tree.knn(point, k) for point in points]) / queries
+
+        print(f"{dimension:>10} {build_elapsed:10.3f} {1000 * box_elapsed:10.4f} {1000 * knn_elapsed:10.4f}")
+
+        results.append((dimension, build_elapsed, box_elapsed, knn_elapsed))
+
+    return results
+
+# Compare the startup of a KDTree built from the points with one loaded from a file written by
+# KDTree.save, up to the answer of a first range query. The file is removed afterwards
+def benchmark_kd_tree_load(sizes=(10**5, 10**6, 10**7), path='kd_tree_benchmark.kdt', seed=0):
+    rng = np.random.default_rng(seed)
+    region = [0.5, 0.51, 0.5, 0.51]
+    results = []
+
+    print(f"{'size':>10} {'file (MB)':>10} {'build (s)':>10} {'load (ms)':>10}")
+
+    for size in sizes:
+        point_set = helpers.PointSet(rng.uniform(0.0, 1.0, size=(size, 2)))
+
+        start = time.perf_counter()
+        tree = kd_tree.KDTree(point_set)
+        tree.investigate_indices(region)
+        build_elapsed = time.perf_counter() - start
+
+        try:
+            tree.save(path)
+            file_size = os.path.getsize(path)
+            load_elapsed = best_time(lambda: kd_tree.KDTree.load(path).investigate_indices(region))
+        finally:
+            os.remove(path)
+
+        print(f"{size:>10} {file_size / 2**20:10.1f} {build_elapsed:10.3f} {1000 * load_elapsed:10.3f}")
+
+        results.append((size, build_elapsed, load_elapsed))
+
+    return results
+
+# Time KDTree range queries (investigate_indices and range_count) on skewed workloads, as the
+# latency per query in milliseconds. The squares are centered on random points of the
+# workload, so they fall where the points are, with sides of each fraction <sides> of the
+# bounding box
+def benchmark_kd_tree_range_queries(size=10**6, distributions=('uniform', 'clusters', 'circle'), sides=(0.01, 0.05),
+                                    queries=200, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+
+    print(f"{'distribution':>14} {'side':>6} {'points':>10} {'investigate (ms)':>18} {'range_count (ms)':>18}")
+
+    for distribution in distributions:
+        coords = workloads.generate(distribution, size, seed=seed)
+        tree = kd_tree.KDTree(helpers.PointSet(coords))
+        extent = coords.max(axis=0) - coords.min(axis=0)
+
+        for side in sides:
+            half = side * extent / 2
+            centers = coords[rng.integers(0, size, queries)]
+            regions = [[x - half[0], x + half[0], y - half[1], y + half[1]] for x, y in centers.tolist()]
+
+            found = sum(len(tree.investigate_indices(region)) for region in regions) / queries
+            investigate_elapsed = best_time(lambda: [tree.investigate_indices(region) for region in regions]) / queries
+            count_elapsed = best_time(lambda: [tree.range_count(region) for region in regions]) / queries
+
+            print(f"{distribution:>14} {side:>6} {found:>10.0f} {1000 * investigate_elapsed:18.4f} {1000 * count_elapsed:18.4f}")
+
+            results.append((distribution, side, investigate_elapsed, count_elapsed))
+
+    return results
+
+# Time the parallel divide and conquer with 1, 2, 4, ... worker processes (up to the core count)
+# and report the speedup over a single worker
+def benchmark_parallel_divide_and_conquer(size=5 * 10**7, max_workers=None, seed=0):
+    rng = np.random.default_rng(seed)
+    point_set = helpers.PointSet(rng.uniform(0.0, 50.0, size=(size, 2)))
+    max_workers = max_workers or os.cpu_count()
+    worker_counts = [2**i for i in range(max_workers.bit_length()) if 2**i <= max_workers]
+    results = []
+
+    print(f"{'workers':>8} {'elapsed':>10} {'speedup':>9}")
+
+    for workers in worker_counts:
+        elapsed = best_time(lambda: convex_hull.divide_and_conquer(point_set, workers=workers), repeats=1)
+        speedup = results[0][1] / elapsed if results else 1.0
+
+        print(f"{workers:>8} {elapsed:10.4f} {speedup:8.1f}x")
+
+        results.append((workers, elapsed))
+
+    return results
+
+# Benchmark suite
+#
+# Each benchmark of SUITE_BENCHMARKS has a setup function that takes the points of a workload
+# (an (N, 2) array, see workloads.py) and returns the function to time, called with no
+# arguments. Stateless functions are called in a loop, calibrated so that one measurement
+# takes at least SUITE_MIN_MEASUREMENT_TIME seconds, and the time per call is kept. Functions
+# that change their input (like adding points to a triangulation) get a fresh setup before
+# every measurement and are called once
+SUITE_MIN_MEASUREMENT_TIME = 0.05
+SUITE_REPEATS = 5
+SUITE_DISTRIBUTIONS = ('uniform', 'disk', 'circle', 'clusters', 'grid', 'collinear')
+
+# The degenerate workloads send most orientations to the exact stage of helpers.ccw_xy, so they
+# only run up to SUITE_DEGENERATE_MAX_SIZE points, to keep the suite short
+SUITE_DEGENERATE_DISTRIBUTIONS = ('grid', 'collinear')
+SUITE_DEGENERATE_MAX_SIZE = 10**4
+
+# Number of points added per measurement of IncrementalDelaunay.add_point and of rectangles
+# queried per measurement of KDTree.investigate
+SUITE_DELAUNAY_NEW_POINTS = 10
+SUITE_KD_TREE_QUERIES = 50
+
+def _hull_setup(algorithm, **kwargs):
+    def setup(coords):
+        points = helpers.PointSet(coords).to_points()
+        return lambda: algorithm(points, **kwargs)
+
+    return setup
+
+def _kd_tree_construction_setup(coords):
+    points = helpers.PointSet(coords).to_points()
+    return lambda: kd_tree.KDTree(points)
+
+# Square queries, each holding about 1% of the bounding box of the points
+def _kd_tree_investigate_setup(coords):
+    tree = kd_tree.KDTree(helpers.PointSet(coords).to_points())
+    low, high = coords.min(axis=0), coords.max(axis=0)
+    side = 0.1 * (high - low)
+
+    rng = np.random.default_rng(0)
+    corners = low + rng.uniform(0.0, 1.0, size=(SUITE_KD_TREE_QUERIES, 2)) * (high - low - side)
+    regions = [[x, x + side[0], y, y + side[1]] for x, y in corners.tolist()]
+
+    def investigate():
+        for region in regions:
+            tree.investigate(region)
+
+    return investigate
+
+def _delaunay_add_point_setup(coords):
+    triangulation = delaunay.IncrementalDelaunay(coords[:-SUITE_DELAUNAY_NEW_POINTS])
+    new_points = coords[-SUITE_DELAUNAY_NEW_POINTS:]
+
+    def add_points():
+        for point in new_points:
+            triangulation.add_point(point)
+
+    return add_points
+
+# A 2D linear program with one constraint per point: the half-plane of points x with
+# (p - c) . x <= |p - c|^2, c the center of the points, after a bounding box that keeps the
+# first partial solutions bounded. Maximizes x1 + 2 x2
+def _lp_setup(coords):
+    directions = coords - coords.mean(axis=0)
+    directions = directions[(directions != 0).any(axis=1)]
+    size = float(np.abs(coords).max()) + 1.0
+
+    A_ub = np.vstack(([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]], directions))
+    b_ub = np.concatenate(([size, size, 2 * size], (directions ** 2).sum(axis=1)))
+
+    return lambda: linprog.incremental_lp_solver([-1, -2], A_ub, b_ub, 2)
+
+# name: (setup, stateless, sizes)
+SUITE_BENCHMARKS = {
+    'grahams_scan': (_hull_setup(convex_hull.grahams_scan, trace=False), True, (10**2, 10**3, 10**4, 10**5)),
+    'gift_wrapping': (_hull_setup(convex_hull.gift_wrapping), True, (10**2, 3 * 10**2, 10**3, 3 * 10**3)),
+    'divide_and_conquer': (_hull_setup(convex_hull.divide_and_conquer), True, (10**2, 10**3, 10**4, 10**5)),
+    'quick_hull': (_hull_setup(convex_hull.quick_hull), True, (10**2, 10**3, 10**4, 10**5)),
+    'kd_tree_construction': (_kd_tree_construction_setup, True, (10**2, 10**3, 10**4, 10**5)),
+    'kd_tree_investigate': (_kd_tree_investigate_setup, True, (10**2, 10**3, 10**4, 10**5)),
+    'delaunay_add_point': (_delaunay_add_point_setup, False, (10**2, 10**3, 10**4, 10**5)),
+    'incremental_lp_solver': (_lp_setup, True, (10**1, 10**2, 10**3)),
+}
+
+# Time one benchmark on one workload, returning the seconds per call of every measurement
+# (after one warm-up call) and the number of calls per measurement
+def _measure(setup, stateless, coords, repeats):
+    function = setup(coords)
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+
+    if not stateless:
+        times = [elapsed]
+
+        for _ in range(repeats - 1):
+            function = setup(coords)
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+
+        return times, 1
+
+    loops = max(1, int(np.ceil(SUITE_MIN_MEASUREMENT_TIME / max(elapsed, 1e-9))))
+    times = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        times.append((time.perf_counter() - start) / loops)
+
+    return times, loops
+
+# Slope of the log-log fit of the median times against the sizes, the empirical exponent
+# of the running time (about 1 for O(n), a bit over 1 for O(n log n), 2 for O(n^2))
+def scaling_exponent(sizes, times):
+    if len(sizes) < 2:
+        return None
+
+    return float(np.polyfit(np.log(sizes), np.log(times), 1)[0])
+
+# Run the benchmarks <names> (all of them by default) on every distribution of <distributions>
+# and every size of <sizes> (by default the sizes of each benchmark, up to
+# SUITE_DEGENERATE_MAX_SIZE for the degenerate distributions). Returns the results as
+# a JSON-ready dict, and writes it to <output> and a log-log plot per benchmark in <plot_dir>
+# when these are given
+def run_suite(names=None, sizes=None, distributions=SUITE_DISTRIBUTIONS, repeats=SUITE_REPEATS,
+              seed=0, output=None, plot_dir=None):
+    results = []
+    exponents = {}
+
+    for name in names or SUITE_BENCHMARKS:
+        setup, stateless, default_sizes = SUITE_BENCHMARKS[name]
+        exponents[name] = {}
+
+        for distribution in distributions:
+            medians = []
+            distribution_sizes = [size for size in sizes or default_sizes
+                                  if distribution not in SUITE_DEGENERATE_DISTRIBUTIONS or size <= SUITE_DEGENERATE_MAX_SIZE]
+
+            for size in distribution_sizes:
+                coords = workloads.generate(distribution, size, seed)
+                times, loops = _measure(setup, stateless, coords, repeats)
+                median = statistics.median(times)
+                medians.append(median)
+
+                results.append({'benchmark': name, 'distribution': distribution, 'n': size, 'loops': loops,
+                                'times': times, 'min': min(times), 'median': median,
+                                'mean': statistics.mean(times), 'stdev': statistics.stdev(times) if len(times) > 1 else 0.0})
+
+                print(f"{name:>22} {distribution:>10} {size:>9} {median:12.6f} s")
+
+            exponents[name][distribution] = scaling_exponent(distribution_sizes, medians)
+
+    report = {'metadata': {'python': platform.python_version(), 'numpy': np.__version__,
+                           'platform': platform.platform(), 'processor': platform.processor(),
+                           'cpu_count': os.cpu_count(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                           'seed': seed, 'repeats': repeats},
+              'results': results,
+              'scaling_exponents': exponents}
+
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if plot_dir is not None:
+        plot_suite(report, plot_dir)
+
+    return report
+
+# Log-log plot of time against size for every benchmark of a suite report, one line per
+# distribution, labeled with its scaling exponent. Returns the file names of the plots
+def plot_suite(report, plot_dir):
+    os.makedirs(plot_dir, exist_ok=True)
+    file_names = []
+
+    for name, exponents in report['scaling_exponents'].items():
+        fig, ax = plt.subplots()
+
+        for distribution, exponent in exponents.items():
+            rows = [row for row in report['results'] if row['benchmark'] == name and row['distribution'] == distribution]
+            label = distribution if exponent is None else f"{distribution} (slope {exponent:.2f})"
+
+            ax.loglog([row['n'] for row in rows], [row['median'] for row in rows], marker='o', label=label)
+
+        ax.set_xlabel('Number of points')
+        ax.set_ylabel('Time per call [seconds]')
+        ax.set_title(name)
+        ax.legend()
+
+        file_name = os.path.join(plot_dir, f"{name}.png")
+        fig.savefig(file_name)
+        plt.close(fig)
+
+        file_names.append(file_name)
+
+    return file_names
+
+# Compare two suite reports (dicts or JSON file names) and return the measurements that got
+# slower than <threshold> times their baseline median, as (benchmark, distribution, n, ratio)
+def compare_suites(baseline, current, threshold=1.2):
+    reports = []
+
+    for report in (baseline, current):
+        if isinstance(report, str):
+            with open(report) as file:
+                report = json.load(file)
+
+        reports.append({(row['benchmark'], row['distribution'], row['n']): row['median'] for row in report['results']})
+
+    baseline, current = reports
+    regressions = []
+
+    for key, median in current.items():
+        if key in baseline and median > threshold * baseline[key]:
+            regressions.append((*key, median / baseline[key]))
+
+    for name, distribution, size, ratio in regressions:
+        print(f"Regression: {name} on {size} {distribution} points is {ratio:.2f}x slower")
+
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Without --suite, runs the algorithm comparisons")
+    parser.add_argument('--suite', action='store_true', help="run the benchmark suite")
+    parser.add_argument('--names', nargs='+', choices=list(SUITE_BENCHMARKS), help="benchmarks of the suite to run")
+    parser.add_argument('--sizes', nargs='+', type=int, help="input sizes, instead of those of each benchmark")
+    parser.add_argument('--distributions', nargs='+', choices=workloads.DISTRIBUTIONS, default=SUITE_DISTRIBUTIONS)
+    parser.add_argument('--repeats', type=int, default=SUITE_REPEATS)
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file for the results")
+    parser.add_argument('--plot-dir', default='benchmark_plots', help="directory for the log-log plots")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to check for regressions")
+    args = parser.parse_args()
+
+    if args.suite:
+        report = run_suite(args.names, args.sizes, args.distributions, args.repeats,
+                           output=args.output, plot_dir=args.plot_dir)
+
+        if args.baseline:
+            compare_suites(args.baseline, report)
+    else:
+        benchmark_monotone_chain()
+        benchmark_akl_toussaint()
+        benchmark_chans_algorithm()
+        benchmark_divide_and_conquer()
+        benchmark_dynamic_hull()
+        benchmark_batch_hull()
+        benchmark_orientation()
+        benchmark_kd_tree_leaf_size()
+        benchmark_kd_tree_range_queries()
+        benchmark_kd_tree_load()
+        benchmark_kd_tree_dimensions()
+        benchmark_parallel_divide_and_conquer()
@@ -4,27 +4,81 @@ from numpy import linalg
 import matplotlib.pyplot as plt
 import helpers as helpers
 import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# Wrap a list of Point2D objects into a PointSet (a PointSet is returned as it is)
+def _to_point_set(points):
+    if isinstance(points, helpers.PointSet):
+        return points
+
+    return helpers.PointSet.from_points(points)
+
+# Turn hull indices back into what the caller passed in: the indices themselves
+# for a PointSet, the matching Point2D objects for a list
+def _from_point_set(points, indices):
+    if isinstance(points, helpers.PointSet):
+        return indices
+
+    return [points[i] for i in indices]
+
+# Run <algorithm> only on the points kept by the Akl-Toussaint filter (see
+# helpers.akl_toussaint_filter) and give the result back in terms of the input points.
+# <shape> is True (octagon), 'octagon' or 'quadrangle'. When <stats> is a dict,
+# the number of discarded points is stored in stats['discarded']
+def _run_culled(algorithm, points, shape, stats):
+    point_set = _to_point_set(points)
+    kept = helpers.akl_toussaint_filter(point_set.x, point_set.y, 'octagon' if shape is True else shape)
+
+    if stats is not None:
+        stats['discarded'] = len(point_set) - len(kept)
+
+    if not isinstance(points, helpers.PointSet):
+        return algorithm([points[i] for i in kept])
+
+    result = algorithm(point_set[kept])
+
+    # grahams_scan and a traced monotone_chain also return their steps
+    if isinstance(result, tuple):
+        hull, steps = result
+        return kept[hull], [(kept[step_hull], step_name) for step_hull, step_name in steps]
+
+    return kept[result]
+
+# The steps of the scan are recorded for visualization and (hull, steps) is returned,
+# unless <trace> is False, in which case only the hull is returned
+def grahams_scan(points, cull=None, stats=None, trace=True):
+    # Discard the points inside the extreme polygon first, if asked to
+    if cull:
+        return _run_culled(lambda subset: grahams_scan(subset, trace=trace), points, cull, stats)
+
+    # A PointSet is handled on its coordinate arrays and gives back hull indices
+    if isinstance(points, helpers.PointSet):
+        return _grahams_scan_indices(points, trace)
 
-def grahams_scan(points):
     # Need of at least three points 
     if len(points) < 3:
         return points
     
     # Store steps of creating convex hull to visualize it
     steps = []
+
+    def record_step(hull, step_name):
+        if trace:
+            steps.append((list(hull), step_name))
     
     # Firstly, sort the point by x-coordinate
     sorted_points = sorted(points)
 
     # Compute upper convex-hull
     upper_hull = [sorted_points[0], sorted_points[1]]
-    steps.append((list(upper_hull), 'Upper Hull'))
+    record_step(upper_hull, 'Upper Hull')
     
     # Start from the third element
     for i in range(2, len(sorted_points)):
         point_i = sorted_points[i]
         upper_hull.append(point_i)
-        steps.append((list(upper_hull), 'Upper Hull'))
+        record_step(upper_hull, 'Upper Hull')
         
         # While there are at least 3 points in the upper convex-hull and the three last don't define CW turn
         while (len(upper_hull) > 2  and (helpers.ccw(upper_hull[-3], upper_hull[-2], upper_hull[-1]) > 0)):
@@ -33,16 +87,16 @@ def grahams_scan(points):
 
     # Similarly for the lower convex-hull
     lower_hull = [sorted_points[-1], sorted_points[-2]]
-    steps.append((list(lower_hull), 'Lower Hull'))
+    record_step(lower_hull, 'Lower Hull')
 
     for i in range(len(sorted_points)-3, -1, -1):
         point_i = sorted_points[i]
         lower_hull.append(point_i)
-        steps.append((list(lower_hull), 'Lower Hull'))
+        record_step(lower_hull, 'Lower Hull')
     
         while (len(lower_hull) > 2 and helpers.ccw(lower_hull[-3], lower_hull[-2], lower_hull[-1]) > 0):
             lower_hull.pop(-2)
-            steps.append((list(lower_hull), 'Lower Hull'))
+            record_step(lower_hull, 'Lower Hull')
 
 
     # Remove the first and the last point from the lower convex-hull in order to don't count duplicates with upper
@@ -51,11 +105,194 @@ def grahams_scan(points):
 
     # The entire convex hull is the concatenation of upper and lower
     entire_hull = upper_hull + lower_hull
-    steps.append((list(entire_hull), 'Final Hull'))
+    record_step(entire_hull, 'Final Hull')
+
+    if not trace:
+        return entire_hull
 
     return entire_hull, steps
 
-def gift_wrapping(points):
+# Graham's scan over the indices of a PointSet. Same hull order (clockwise, starting
+# from the leftmost point) and same steps as grahams_scan, but with indices in place of points
+def _grahams_scan_indices(point_set, trace=True):
+    n = len(point_set)
+
+    if n < 3:
+        return (np.arange(n), []) if trace else np.arange(n)
+
+    xs = point_set.x.tolist()
+    ys = point_set.y.tolist()
+
+    def ccw(i, j, k):
+        return helpers.ccw_xy(xs[i], ys[i], xs[j], ys[j], xs[k], ys[k])
+
+    steps = []
+
+    def record_step(hull, step_name):
+        if trace:
+            steps.append((list(hull), step_name))
+
+    # Sort the indices by x-coordinate (and by y-coordinate for equal x)
+    sorted_indices = np.lexsort((point_set.y, point_set.x))
+
+    # Coinciding points would never be popped from the hulls, so only one copy is scanned
+    sorted_x, sorted_y = point_set.x[sorted_indices], point_set.y[sorted_indices]
+    is_distinct = np.ones(n, dtype=bool)
+    is_distinct[1:] = (sorted_x[1:] != sorted_x[:-1]) | (sorted_y[1:] != sorted_y[:-1])
+    sorted_indices = sorted_indices[is_distinct].tolist()
+
+    if len(sorted_indices) < 2:
+        hull = np.array(sorted_indices, dtype=np.intp)
+        return (hull, []) if trace else hull
+
+    upper_hull = [sorted_indices[0], sorted_indices[1]]
+    record_step(upper_hull, 'Upper Hull')
+
+    for i in sorted_indices[2:]:
+        upper_hull.append(i)
+        record_step(upper_hull, 'Upper Hull')
+
+        while len(upper_hull) > 2 and ccw(upper_hull[-3], upper_hull[-2], upper_hull[-1]) > 0:
+            upper_hull.pop(-2)
+
+    lower_hull = [sorted_indices[-1], sorted_indices[-2]]
+    record_step(lower_hull, 'Lower Hull')
+
+    for i in sorted_indices[-3::-1]:
+        lower_hull.append(i)
+        record_step(lower_hull, 'Lower Hull')
+
+        while len(lower_hull) > 2 and ccw(lower_hull[-3], lower_hull[-2], lower_hull[-1]) > 0:
+            lower_hull.pop(-2)
+            record_step(lower_hull, 'Lower Hull')
+
+    entire_hull = upper_hull + lower_hull[1:-1]
+    record_step(entire_hull, 'Final Hull')
+
+    if not trace:
+        return np.array(entire_hull, dtype=np.intp)
+
+    return np.array(entire_hull, dtype=np.intp), steps
+
+# Chains shorter than this are finished by the stack-based scan right away, and a
+# vectorized pass has to drop at least 1/MONOTONE_CHAIN_MIN_PASS_GAIN of the chain to be repeated
+MONOTONE_CHAIN_MIN_PASS_SIZE = 64
+MONOTONE_CHAIN_MIN_PASS_GAIN = 8
+
+# Sort positions of a PointSet lexicographically (by x, then by y). Sorting on x alone is
+# much faster than a lexsort, so the lexsort is only paid when some x-coordinates are equal
+def _lexicographic_order(x, y):
+    order = np.argsort(x)
+    sorted_x = x[order]
+
+    if (sorted_x[1:] == sorted_x[:-1]).any():
+        order = np.lexsort((y, x))
+
+    return order
+
+# Vectorized half of the monotone chain over lexicographically sorted coordinates.
+# <sign> is 1 for the upper chain and -1 for the lower one. Every pass drops, all at once,
+# the middle points of the triples that don't make a strict turn in the right direction;
+# such a point lies under (or over) the segment of its neighbors, so it can't be a hull
+# vertex no matter what else is dropped in the same pass. When a pass stops paying off,
+# the few remaining points are finished with the usual stack-based scan
+def _monotone_half_chain(xs, ys, sign, steps=None, step_name=None):
+    last = len(xs) - 1
+
+    # Only the points strictly on the chain's side of the line between the two ends can be on it
+    orientations = helpers.ccw_xy(xs[0], ys[0], xs[last], ys[last], xs, ys) * sign
+    chain = np.concatenate(([0], np.flatnonzero(orientations > 0), [last]))
+    chain_x, chain_y = xs[chain], ys[chain]
+
+    while len(chain) > MONOTONE_CHAIN_MIN_PASS_SIZE:
+        is_dropped = helpers.ccw_xy(chain_x[:-2], chain_y[:-2], chain_x[1:-1], chain_y[1:-1],
+                                    chain_x[2:], chain_y[2:]) * sign >= 0
+        dropped = int(np.count_nonzero(is_dropped))
+
+        if dropped == 0:
+            return chain.tolist()
+
+        keep = np.ones(len(chain), dtype=bool)
+        keep[1:-1] = ~is_dropped
+        chain, chain_x, chain_y = chain[keep], chain_x[keep], chain_y[keep]
+
+        if steps is not None:
+            steps.append((chain.tolist(), step_name))
+
+        if dropped * MONOTONE_CHAIN_MIN_PASS_GAIN < len(chain):
+            break
+
+    chain_x = chain_x.tolist()
+    chain_y = chain_y.tolist()
+    half_hull = []
+
+    # The stack keeps positions in <chain>
+    for k in range(len(chain)):
+        while len(half_hull) > 1 and helpers.ccw_xy(chain_x[half_hull[-2]], chain_y[half_hull[-2]],
+                                                    chain_x[half_hull[-1]], chain_y[half_hull[-1]],
+                                                    chain_x[k], chain_y[k]) * sign >= 0:
+            half_hull.pop()
+
+        half_hull.append(k)
+
+    half_hull = chain[half_hull].tolist()
+
+    if steps is not None:
+        steps.append((list(half_hull), step_name))
+
+    return half_hull
+
+# Production hull engine: Andrew's monotone chain on NumPy arrays
+# Works like grahams_scan (same clockwise order, starting from the leftmost point), but it
+# sorts with NumPy, evaluates the orientations of whole chains per call and leaves out the
+# collinear points of the hull edges. The steps for visualization are only recorded when
+# <trace> is set, and then (hull, steps) is returned instead of the hull alone
+# Like the other algorithms, <cull> discards the points inside the extreme polygon first
+def monotone_chain(points, trace=False, cull=None, stats=None):
+    if cull:
+        return _run_culled(lambda subset: monotone_chain(subset, trace), points, cull, stats)
+
+    point_set = _to_point_set(points)
+    n = len(point_set)
+    steps = [] if trace else None
+
+    if n < 3:
+        hull = np.arange(n)
+    else:
+        order = _lexicographic_order(point_set.x, point_set.y)
+        xs = point_set.x[order]
+        ys = point_set.y[order]
+
+        # Keep one copy of coinciding points, otherwise a pass could drop all copies at once
+        is_distinct = np.ones(n, dtype=bool)
+        is_distinct[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+
+        if not is_distinct.all():
+            order, xs, ys = order[is_distinct], xs[is_distinct], ys[is_distinct]
+
+        if len(order) == 1:
+            hull = order
+        else:
+            upper_hull = _monotone_half_chain(xs, ys, 1, steps, 'Upper Hull')
+            lower_hull = _monotone_half_chain(xs, ys, -1, steps, 'Lower Hull')
+
+            hull = order[upper_hull + lower_hull[-2:0:-1]]
+
+    if trace:
+        steps = [(_from_point_set(points, order[chain]), step_name) for chain, step_name in steps]
+        steps.append((_from_point_set(points, hull), 'Final Hull'))
+
+        return _from_point_set(points, hull), steps
+
+    return _from_point_set(points, hull)
+
+def gift_wrapping(points, cull=None, stats=None):
+    if cull:
+        return _run_culled(gift_wrapping, points, cull, stats)
+
+    if isinstance(points, helpers.PointSet):
+        return _gift_wrapping_indices(points)
+
     # Need of at least three points 
     if len(points) < 3:
         return points
@@ -96,33 +333,386 @@ def gift_wrapping(points):
 
     return vertex_chain  
 
+# Gift-wrapping step over coordinate arrays: the position of the point that leaves every other
+# point left of (or on) the line from <r> to it, the furthest one among collinear candidates.
+# Any point right of the line to the current candidate replaces it, until no such point is left
+# Returns -1 when all the points coincide with <r>
+def _next_hull_vertex(rx, ry, x, y):
+    squared_distances = (x - rx) ** 2 + (y - ry) ** 2
+
+    # Start from the furthest point, which never coincides with <r>
+    candidate_u = int(np.argmax(squared_distances))
+
+    if squared_distances[candidate_u] == 0:
+        return -1
+
+    while True:
+        orientations = helpers.ccw_xy(rx, ry, x[candidate_u], y[candidate_u], x, y)
+        point_t = int(np.argmin(orientations))
+
+        if orientations[point_t] < 0:
+            candidate_u = point_t
+        else:
+            break
+
+    collinear = np.flatnonzero(orientations == 0)
+
+    return int(collinear[np.argmax(squared_distances[collinear])])
+
+# Gift wrapping over the indices of a PointSet. Each wrapping step tests the candidate
+# against all points at once (see _next_hull_vertex)
+def _gift_wrapping_indices(point_set):
+    n = len(point_set)
+
+    if n < 3:
+        return np.arange(n)
+
+    x, y = point_set.x, point_set.y
+
+    leftmost_vertex = int(np.lexsort((y, x))[0])
+    current_vertex_r = leftmost_vertex
+
+    vertex_chain = [leftmost_vertex]
+
+    # A convex polygon on n points has at most n vertices, so the loop is bounded
+    for _ in range(n):
+        candidate_u = _next_hull_vertex(x[current_vertex_r], y[current_vertex_r], x, y)
+
+        if candidate_u == -1 or (x[candidate_u] == x[leftmost_vertex] and y[candidate_u] == y[leftmost_vertex]):
+            break
+
+        current_vertex_r = candidate_u
+        vertex_chain.append(current_vertex_r)
+
+    return np.array(vertex_chain, dtype=np.intp)
+
+# Convert the hull returned by grahams_scan (clockwise, with the collinear points of its
+# edges) to a counter-clockwise strictly convex polygon, as the tangent search needs it
+def _strictly_convex_ccw(hull, x, y):
+    hull = hull[::-1]
+    hx, hy = x[hull], y[hull]
+
+    # Coinciding consecutive vertices first, then the vertices with no turn
+    is_distinct = (hx != np.roll(hx, 1)) | (hy != np.roll(hy, 1))
+
+    if is_distinct.any():
+        hull, hx, hy = hull[is_distinct], hx[is_distinct], hy[is_distinct]
+    else:
+        return hull[:1]
+
+    if len(hull) > 2:
+        turns = helpers.ccw_xy(np.roll(hx, 1), np.roll(hy, 1), hx, hy, np.roll(hx, -1), np.roll(hy, -1))
+
+        if (turns != 0).any():
+            hull = hull[turns != 0]
+        else:
+            # All the points are collinear, so the "polygon" is the segment of the two ends
+            ends = np.lexsort((hy, hx))
+            hull = hull[[ends[0], ends[-1]]]
+
+    return hull
+
+# Vectorized binary search of the tangents from point <p> to many strictly convex
+# counter-clockwise polygons at once. The polygons are stored one after the other in
+# <hulls>, polygon g taking hulls[starts[g]:starts[g] + sizes[g]]. For each polygon the
+# result is the position (in <hulls>) of the vertex q that leaves the polygon left of
+# (or on) the line from p to q, which is the next candidate of the Jarvis march
+#
+# Seen from an outside point, the angles of the vertices of a convex polygon first decrease
+# and then increase (cyclically), so the search looks for the minimum of that sequence
+def _polygon_tangents(px, py, hulls, starts, sizes, x, y):
+    def turn(i, j):
+        return np.sign(helpers.ccw_xy(px, py, x[hulls[i]], y[hulls[i]], x[hulls[j]], y[hulls[j]]))
+
+    def position(offset):
+        return starts + offset % sizes
+
+    # Vertex 0 of each polygon might be the minimum already
+    turn_at_start = turn(starts, position(1))
+    result = np.where((turn_at_start >= 0) & (turn(starts, position(sizes - 1)) >= 0), starts, -1)
+
+    # Otherwise it lies in 1..size-1. From vertex 0 the angles either go down, up and down
+    # again, ending above the angle of vertex 0, or go up, down and up again, ending below it
+    is_down_at_start = turn_at_start < 0
+    low = np.ones_like(sizes)
+    high = sizes - 1
+    active = np.flatnonzero((result == -1) & (low < high))
+
+    while len(active):
+        g_starts, g_sizes = starts[active], sizes[active]
+        middle = (low[active] + high[active]) // 2
+        current = g_starts + middle
+
+        after = turn(current, g_starts + (middle + 1) % g_sizes)
+        before = turn(current, g_starts + (middle - 1) % g_sizes)
+        is_found = (after >= 0) & (before >= 0)
+
+        result[active[is_found]] = current[is_found]
+
+        # Whether the minimum lies behind the middle vertex follows from the direction there
+        # (a flat step can only be the maximum here) and from its angle against vertex 0
+        is_up = after >= 0
+        angle_to_start = turn(g_starts, current)
+        is_behind = np.where(is_down_at_start[active], is_up | (angle_to_start > 0), is_up & (angle_to_start < 0))
+
+        high[active] = np.where(is_behind, middle - 1, high[active])
+        low[active] = np.where(is_behind, low[active], middle + 1)
+
+        active = active[~is_found & (low[active] < high[active])]
+
+    unresolved = result == -1
+    result[unresolved] = starts[unresolved] + low[unresolved] % sizes[unresolved]
+
+    return result
+
+# Jarvis march over the mini-hulls of Chan's algorithm. The points are split in groups of
+# (at most) <m> consecutive indices, each group gets its hull from grahams_scan, and every
+# wrapping step picks the next vertex among the tangents to the mini-hulls
+# Returns None when the hull has more than <m> vertices
+def _chans_wrap(x, y, m, start):
+    n = len(x)
+    hulls = []
+    hull_starts = []
+    hull_sizes = []
+
+    # Position of each point in <hulls>, if it is a mini-hull vertex
+    hull_position = np.full(n, -1, dtype=np.intp)
+    offset = 0
+
+    for low in range(0, n, m):
+        group = helpers.PointSet(np.column_stack((x[low:low + m], y[low:low + m])))
+        hull = _strictly_convex_ccw(grahams_scan(group, trace=False), group.x, group.y) + low
+
+        hull_position[hull] = np.arange(offset, offset + len(hull))
+        hulls.append(hull)
+        hull_starts.append(offset)
+        hull_sizes.append(len(hull))
+        offset += len(hull)
+
+    hulls = np.concatenate(hulls)
+    hull_starts = np.array(hull_starts, dtype=np.intp)
+    hull_sizes = np.array(hull_sizes, dtype=np.intp)
+    hull_group = np.repeat(np.arange(len(hull_sizes)), hull_sizes)
+
+    vertex_chain = [start]
+    current = start
+
+    for _ in range(m):
+        px, py = x[current], y[current]
+        tangents = _polygon_tangents(px, py, hulls, hull_starts, hull_sizes, x, y)
+
+        # The mini-hull the current vertex belongs to continues with its own next vertex
+        position = hull_position[current]
+        if position != -1:
+            group = hull_group[position]
+            tangents[group] = hull_starts[group] + (position - hull_starts[group] + 1) % hull_sizes[group]
+
+        # The binary search assumes a point outside each polygon. A tangent that isn't locally
+        # one (the current vertex lies on that polygon, e.g. as a duplicate) is searched linearly
+        tangents = _fix_polygon_tangents(px, py, tangents, hulls, hull_starts, hull_sizes, hull_group, x, y)
+
+        candidates = hulls[tangents]
+        next_vertex = _next_hull_vertex(px, py, x[candidates], y[candidates])
+
+        if next_vertex == -1:
+            return vertex_chain
+
+        current = int(candidates[next_vertex])
+
+        if x[current] == x[start] and y[current] == y[start]:
+            return vertex_chain
+
+        vertex_chain.append(current)
+
+    return None
+
+# Check that each tangent of _polygon_tangents leaves both its neighbors left of (or on) the
+# line from p, and that it doesn't coincide with p. For the rare ones that fail, scan the
+# polygon with the gift-wrapping step instead
+def _fix_polygon_tangents(px, py, tangents, hulls, starts, sizes, groups, x, y):
+    g = groups[tangents]
+    following = starts[g] + (tangents - starts[g] + 1) % sizes[g]
+    preceding = starts[g] + (tangents - starts[g] - 1) % sizes[g]
+
+    q, after, before = hulls[tangents], hulls[following], hulls[preceding]
+    turn_after = helpers.ccw_xy(px, py, x[q], y[q], x[after], y[after])
+    is_wrong = (turn_after < 0) | \
+               (helpers.ccw_xy(px, py, x[q], y[q], x[before], y[before]) < 0) | \
+               ((x[q] == px) & (y[q] == py))
+
+    # When the polygon touches the line with a whole edge, its far end is the one
+    # the Jarvis march needs, and it is always the next vertex counter-clockwise
+    is_edge = ~is_wrong & (turn_after == 0) & (following != tangents)
+    tangents = np.where(is_edge, following, tangents)
+
+    for i in np.flatnonzero(is_wrong):
+        polygon = hulls[starts[i]:starts[i] + sizes[i]]
+        vertex = _next_hull_vertex(px, py, x[polygon], y[polygon])
+
+        if vertex != -1:
+            tangents[i] = starts[i] + vertex
+
+    return tangents
+
+# First guess of the hull size in Chan's algorithm. The textbook schedule starts from 4,
+# but the groups that small cost a Graham's scan call for every 4 points
+CHANS_INITIAL_GROUP_SIZE = 64
+
+# Chan's output-sensitive algorithm, O(n log h) for a hull of h vertices
+# Guesses the hull size m, squaring it after each failed guess, splits the points in groups
+# of m with hulls found by Graham's scan, and wraps them with binary-searched tangents. Each
+# guess that is too small is abandoned after m wrapping steps. Same (counter-clockwise)
+# order as gift_wrapping, without the collinear points of the hull edges
+def chans_algorithm(points, cull=None, stats=None):
+    if cull:
+        return _run_culled(chans_algorithm, points, cull, stats)
+
+    point_set = _to_point_set(points)
+    n = len(point_set)
+
+    if n < 3:
+        return _from_point_set(points, np.arange(n))
+
+    x, y = point_set.x, point_set.y
+    start = int(np.lexsort((y, x))[0])
+
+    m = CHANS_INITIAL_GROUP_SIZE
+    while True:
+
+        # A single group is its own hull, there is nothing left to wrap
+        if m >= n:
+            hull = _strictly_convex_ccw(grahams_scan(point_set, trace=False), x, y)
+            leftmost = int(np.lexsort((y[hull], x[hull]))[0])
+
+            return _from_point_set(points, np.roll(hull, -leftmost))
+
+        hull = _chans_wrap(x, y, m, start)
+
+        if hull is not None:
+            return _from_point_set(points, np.array(hull, dtype=np.intp))
+
+        m = m * m
+
+# Hull of a list of Point2D objects sorted lexicographically, counter-clockwise from the
+# leftmost point. The neighbor links of the merges are kept in lists local to the call
+# (see _divide_and_conquer_positions), so the points themselves are never modified
+# Coinciding points can't be told apart by the merges, so only the first copy is kept
 def divide_and_conquer_helper(points):
-    # Base Case
-    if len(points) == 1:
-        return points
-    
-    median = int(len(points)/2)    
+    points = [point for i, point in enumerate(points) if i == 0 or point != points[i - 1]]
+
+    xs = [point.x for point in points]
+    ys = [point.y for point in points]
+
+    return [points[i] for i in _divide_and_conquer_positions(xs, ys)]
 
-    left_points = points[0:median]
-    right_points = points[median:]
+# With <workers> set, the points are split in that many x-separated chunks whose hulls are
+# computed in a process pool and merged afterwards (see _parallel_divide_and_conquer_indices).
+# The result is then strictly convex, counter-clockwise from the leftmost point
+def divide_and_conquer(points, cull=None, stats=None, workers=None):
+    if cull:
+        return _run_culled(lambda subset: divide_and_conquer(subset, workers=workers), points, cull, stats)
 
-    left_hull = divide_and_conquer_helper(left_points)
-    right_hull = divide_and_conquer_helper(right_points)
+    if workers is not None:
+        return _from_point_set(points, _parallel_divide_and_conquer_indices(_to_point_set(points), workers))
 
-    return convex_hulls_merge(left_hull, right_hull)
+    if isinstance(points, helpers.PointSet):
+        return _divide_and_conquer_indices(points)
 
-def divide_and_conquer(points):
     # Need of at least three points
     if (len(points) < 3):
         return points
     
     return divide_and_conquer_helper(sorted(points))
 
-def convex_hulls_merge(A_hull, B_hull):
-    A = max(A_hull) # Rightmost point of left hull
-    B = min(B_hull) # Leftmost point of right hull
+# Divide and conquer over the indices of a PointSet
+def _divide_and_conquer_indices(point_set):
+    n = len(point_set)
+
+    if n < 3:
+        return np.arange(n)
+
+    sorted_indices = np.lexsort((point_set.y, point_set.x))
+
+    # Coinciding points can't be told apart by the merges, so only one copy is kept
+    sorted_x, sorted_y = point_set.x[sorted_indices], point_set.y[sorted_indices]
+    is_distinct = np.ones(n, dtype=bool)
+    is_distinct[1:] = (sorted_x[1:] != sorted_x[:-1]) | (sorted_y[1:] != sorted_y[:-1])
+    sorted_indices = sorted_indices[is_distinct]
+
+    xs = point_set.x[sorted_indices].tolist()
+    ys = point_set.y[sorted_indices].tolist()
+
+    return sorted_indices[_divide_and_conquer_positions(xs, ys)]
+
+# Divide and conquer over points sorted lexicographically, given by their coordinates <xs>, <ys>
+# The clockwise and counter-clockwise neighbors live in two lists indexed by sorted position
+# (-1 stands for no neighbor) that belong to this call only, so concurrent calls over the
+# same points don't interfere. Returns the hull positions, counter-clockwise from position 0
+def _divide_and_conquer_positions(xs, ys):
+    n = len(xs)
+
+    if n == 1:
+        return [0]
+
+    cw_next = [-1] * n
+    ccw_next = [-1] * n
+
+    def helper(low, high):
+        if high - low == 1:
+            return
+
+        median = (low + high) // 2
+
+        helper(low, median)
+        helper(median, high)
+
+        # The rightmost point of the left half and the leftmost point of the right half
+        # are always vertices of their hulls, since the positions are sorted
+        _convex_hulls_merge_indices(median - 1, median, xs, ys, cw_next, ccw_next)
+
+    helper(0, n)
+
+    return _walk_ccw(0, ccw_next)
+
+# Positions of a hull in counter-clockwise order, following <ccw_next> from <start>
+def _walk_ccw(start, ccw_next):
+    result = [start]
+    current = ccw_next[start]
+
+    while current != start:
+        result.append(current)
+        current = ccw_next[current]
+
+    return result
+
+# Same merge as convex_hulls_merge, on positions <A> and <B> and the neighbor lists
+# Returns the left end of the upper bridge, which is a vertex of the merged hull
+# A bridge end also moves onto a neighbor that is collinear with the bridge and farther along
+# it, so the merged hull stays strictly convex and collinear halves merge into one segment
+# The two hulls can't share a point: the walks can't tell coinciding positions apart and would
+# link them into a cycle of their own. Since every two consecutive sorted positions are <A> and
+# <B> of some merge, checking them is enough to catch any repeated point
+def _convex_hulls_merge_indices(A, B, xs, ys, cw_next, ccw_next):
+    if xs[A] == xs[B] and ys[A] == ys[B]:
+        raise ValueError(f"divide and conquer: coinciding points ({xs[A]}, {ys[A]}) in the merged hulls")
+
+    # Whether <k>, collinear with <i> and <j>, lies beyond <j> as seen from <i>
+    def is_beyond(i, j, k):
+        return (xs[k] - xs[j]) * (xs[j] - xs[i]) + (ys[k] - ys[j]) * (ys[j] - ys[i]) > 0
+
+    # The orientation of i, j, k runs once per step of the walks, so the float filter of
+    # helpers.orientation is inlined here, and only the triples it can't decide go through it
+    def moves(i, j, k, sign):
+        x_k, y_k = xs[k], ys[k]
+        det_left = (xs[i] - x_k) * (ys[j] - y_k)
+        det_right = (ys[i] - y_k) * (xs[j] - x_k)
+        turn = det_left - det_right
+
+        if abs(turn) < helpers.CCW_ERROR_BOUND * abs(det_left + det_right):
+            turn = helpers.orientation(xs[i], ys[i], xs[j], ys[j], x_k, y_k)
+
+        return turn * sign > 0 or (turn == 0 and is_beyond(i, j, k))
 
-    # Make copies for both of these points
     A_copy = A
     B_copy = B
 
@@ -131,17 +721,13 @@ def convex_hulls_merge(A_hull, B_hull):
         prev_A = A
         prev_B = B
 
-        # Find the vertex that belongs to right convex hull and to the final upper bridge
-        if B.cw_next:
-            # Move B clockwise as long as it makes a left turn
-            while helpers.ccw(A, B, B.cw_next) > 0:
-                B = B.cw_next
+        if cw_next[B] != -1:
+            while moves(A, B, cw_next[B], 1):
+                B = cw_next[B]
 
-        # Find the vertex that belongs to left convex hull and to the final upper bridge
-        if A.ccw_next:
-            # Move p counterclockwise as long as it makes a right turn
-            while helpers.ccw(B, A, A.ccw_next) < 0:
-                A = A.ccw_next
+        if ccw_next[A] != -1:
+            while moves(B, A, ccw_next[A], -1):
+                A = ccw_next[A]
 
         if A == prev_A and B == prev_B:
             break
@@ -151,65 +737,777 @@ def convex_hulls_merge(A_hull, B_hull):
         prev_A = A_copy
         prev_B = B_copy
 
-        if B_copy.ccw_next:
-            # Move q counterlockwise as long as it makes a right turn
-            while helpers.ccw(A_copy, B_copy, B_copy.ccw_next) < 0:
-                B_copy = B_copy.ccw_next
+        if ccw_next[B_copy] != -1:
+            while moves(A_copy, B_copy, ccw_next[B_copy], -1):
+                B_copy = ccw_next[B_copy]
 
-        if A_copy.cw_next:
-            # Move p clockwise as long as it makes a left turn
-            while helpers.ccw(B_copy, A_copy, A_copy.cw_next) > 0:
-                A_copy = A_copy.cw_next
+        if cw_next[A_copy] != -1:
+            while moves(B_copy, A_copy, cw_next[A_copy], 1):
+                A_copy = cw_next[A_copy]
 
         if A_copy == prev_A and B_copy == prev_B:
             break
 
     # Remove all other intermediate points
-    A.cw_next = B
-    B.ccw_next = A
+    cw_next[A] = B
+    ccw_next[B] = A
+
+    ccw_next[A_copy] = B_copy
+    cw_next[B_copy] = A_copy
+
+    return A
+
+# Merge two hulls (lists of Point2D objects in counter-clockwise order), with every point of
+# <A_hull> left of every point of <B_hull> (and none of them in both). The neighbor links are built for this call only,
+# from the order of the two lists, so the points are left untouched
+# Returns the merged hull counter-clockwise, starting from the left end of the upper bridge
+def convex_hulls_merge(A_hull, B_hull):
+    points = A_hull + B_hull
+    xs = [point.x for point in points]
+    ys = [point.y for point in points]
+
+    n = len(points)
+    cw_next = [-1] * n
+    ccw_next = [-1] * n
+
+    # Each hull is a cycle of its own (a single point has no neighbors)
+    for low, high in ((0, len(A_hull)), (len(A_hull), n)):
+        if high - low > 1:
+            for i in range(low, high):
+                ccw_next[i] = i + 1 if i + 1 < high else low
+                cw_next[i] = i - 1 if i > low else high - 1
+
+    # Rightmost point of left hull and leftmost point of right hull
+    A = max(range(len(A_hull)), key=lambda i: (xs[i], ys[i]))
+    B = min(range(len(A_hull), n), key=lambda i: (xs[i], ys[i]))
+
+    start = _convex_hulls_merge_indices(A, B, xs, ys, cw_next, ccw_next)
+
+    # Construct the final merged hull
+    return [points[i] for i in _walk_ccw(start, ccw_next)]
 
-    A_copy.ccw_next = B_copy
-    B_copy.cw_next = A_copy
+# Smallest chunk given to a worker of the parallel divide and conquer. Below that, starting
+# the pool and copying to shared memory cost more than the hull itself
+PARALLEL_MIN_CHUNK_SIZE = 10**5
 
-    # Construct the final merged hall
-    result = []
-    start = A
+# Hull of one chunk in a worker process. The coordinates and the chunked order of the points
+# are read from shared memory, so only the names, the chunk range and the hull are pickled.
+# Returns the hull as indices into the full point set, counter-clockwise
+def _divide_and_conquer_chunk(coords_name, order_name, n, low, high):
+    coords_memory = shared_memory.SharedMemory(name=coords_name)
+    order_memory = shared_memory.SharedMemory(name=order_name)
+    coords = np.ndarray((n, 2), dtype=np.float64, buffer=coords_memory.buf)
+    order = np.ndarray((n,), dtype=np.intp, buffer=order_memory.buf)
 
+    try:
+        chunk = order[low:high].copy()
+        hull = monotone_chain(helpers.PointSet(coords[chunk]))
+
+        return chunk[hull[::-1]]
+    finally:
+        del coords, order
+        coords_memory.close()
+        order_memory.close()
+
+# Merge two counter-clockwise hulls (index arrays), with every point of <left> left of every
+# point of <right>. Same bridge walks as convex_hulls_merge, but the neighbors of a vertex are
+# its positions +1 / -1 (mod the hull size) in the arrays, so there are no links to store
+# Returns the merged hull counter-clockwise
+def _bridge_merge(left, right, x, y):
+    left_size, right_size = len(left), len(right)
+
+    # Whether moving the end <j> of the line i -> j to <k> turns it to the side <sign>, or keeps
+    # it and gets further from <i> (collinear points are walked to the end of the bridge)
+    def is_better(i, j, k, sign):
+        orientation = helpers.ccw_xy(x[i], y[i], x[j], y[j], x[k], y[k])
+
+        if orientation != 0:
+            return orientation * sign > 0
+
+        return (x[k] - x[i]) ** 2 + (y[k] - y[i]) ** 2 > (x[j] - x[i]) ** 2 + (y[j] - y[i]) ** 2
+
+    # Rightmost point of left hull and leftmost point of right hull
+    A = int(np.argmax(x[left]))
+    B = int(np.argmin(x[right]))
+    A_copy = A
+    B_copy = B
+
+    # Find the upper bridge, moving A counter-clockwise and B clockwise
     while True:
-        result.append(A)
-        A = A.ccw_next
+        prev_A = A
+        prev_B = B
+
+        while is_better(left[A], right[B], right[(B - 1) % right_size], 1):
+            B = (B - 1) % right_size
 
-        if A == start:
+        while is_better(right[B], left[A], left[(A + 1) % left_size], -1):
+            A = (A + 1) % left_size
+
+        if A == prev_A and B == prev_B:
             break
 
-    return result
+    # Similarly for the lower bridge, moving A clockwise and B counter-clockwise
+    while True:
+        prev_A = A_copy
+        prev_B = B_copy
+
+        while is_better(left[A_copy], right[B_copy], right[(B_copy + 1) % right_size], -1):
+            B_copy = (B_copy + 1) % right_size
+
+        while is_better(right[B_copy], left[A_copy], left[(A_copy - 1) % left_size], 1):
+            A_copy = (A_copy - 1) % left_size
+
+        if A_copy == prev_A and B_copy == prev_B:
+            break
 
-# Recursive method to compute extra convex-hull vertices from the quadrangle with the furthest vertices
-def quick_hull_helper(A, B, points):
-    # Firstly compute the right half plane defined by the line of 2D-points A,B
-    right_h_plane = helpers.right_half_plane(A, B, points)
+    # Left hull from the upper to the lower bridge, then right hull from the lower to the upper one
+    left_part = left[(A + np.arange((A_copy - A) % left_size + 1)) % left_size]
+    right_part = right[(B_copy + np.arange((B - B_copy) % right_size + 1)) % right_size]
 
-    if (right_h_plane == []):
-        return []
+    return np.concatenate((left_part, right_part))
 
-    # Compute the new convex-hull vertex which is the furthest point to the line defined by A,B
-    C = helpers.furthest_point_to_line(right_h_plane, A, B)
+# Parallel divide and conquer over the indices of a PointSet
+#
+# The points are split in (at most) <workers> chunks by x quantiles of a sample, equal x
+# coordinates always going to the same chunk, so the chunks are separated by vertical lines.
+# Grouping the points by chunk is a stable sort of small integer labels (a radix sort), not a
+# full sort. The chunk hulls are computed by monotone_chain in a process pool, reading the
+# points from shared memory, and merged left to right by _bridge_merge in this process
+def _parallel_divide_and_conquer_indices(point_set, workers):
+    n = len(point_set)
+    x, y = point_set.x, point_set.y
 
-    # Compute extra vertices for the two new lines defined by AC and CB and add it to new vertex C
-    return quick_hull_helper(A, C, points) + [C] + quick_hull_helper(C, B, points)
+    if n < 3:
+        return np.arange(n)
+
+    chunks = max(1, min(workers, n // PARALLEL_MIN_CHUNK_SIZE))
+
+    if chunks == 1:
+        hull = monotone_chain(point_set)[::-1]
+    else:
+        sample = x[::max(1, n // (1000 * chunks))]
+        bounds = np.unique(np.quantile(sample, np.arange(1, chunks) / chunks))
+        labels = np.searchsorted(bounds, x, side='right').astype(np.int16)
+        chunk_ends = np.cumsum(np.bincount(labels, minlength=len(bounds) + 1)).tolist()
+
+        coords_memory = shared_memory.SharedMemory(create=True, size=16 * n)
+        order_memory = shared_memory.SharedMemory(create=True, size=np.dtype(np.intp).itemsize * n)
+        coords = np.ndarray((n, 2), dtype=np.float64, buffer=coords_memory.buf)
+        order = np.ndarray((n,), dtype=np.intp, buffer=order_memory.buf)
+
+        try:
+            coords[:, 0], coords[:, 1] = x, y
+            order[:] = np.argsort(labels, kind='stable')
+            del labels
+
+            ranges = [(low, high) for low, high in zip([0] + chunk_ends[:-1], chunk_ends) if low < high]
+
+            with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+                futures = [executor.submit(_divide_and_conquer_chunk, coords_memory.name, order_memory.name, n, low, high)
+                           for low, high in ranges]
+
+                hull = futures[0].result()
+                for future in futures[1:]:
+                    hull = _bridge_merge(hull, future.result(), x, y)
+        finally:
+            del coords, order
+            coords_memory.close()
+            coords_memory.unlink()
+            order_memory.close()
+            order_memory.unlink()
+
+    # Drop any collinear vertex left where the hulls were joined (_strictly_convex_ccw takes a
+    # clockwise hull) and start from the leftmost point, as the serial version does
+    hull = _strictly_convex_ccw(hull[::-1], x, y)
+    leftmost = int(np.lexsort((y[hull], x[hull]))[0])
+
+    return np.roll(hull, -leftmost)
+
+# Lists of Point2D objects are handled by the same iterative implementation as a PointSet
+# (see _quick_hull_indices), so adversarial inputs can't hit the recursion limit
+def quick_hull(points, cull=None, stats=None):
+    if cull:
+        return _run_culled(quick_hull, points, cull, stats)
+
+    if isinstance(points, helpers.PointSet):
+        return _quick_hull_indices(points)
 
-def quick_hull(points):
     # Need of at three points
     if (len(points) < 3):
         return points
-    
-    # Compute the four edge vertices
-    leftmost, lower, rightmost, upper = helpers.find_furthest_quadrangle(points)
 
-    # Return computed vertices and extra vertices for each space defined by the half planes of the above 2D-points
-    return [leftmost] + quick_hull_helper(leftmost, lower, points) + [lower] +\
-           quick_hull_helper(lower, rightmost, points) + [rightmost] + quick_hull_helper(rightmost, upper, points) +\
-           [upper] + quick_hull_helper(upper, leftmost, points)
+    return _from_point_set(points, _quick_hull_indices(_to_point_set(points)))
+
+# Split the points of indices[low:high] (all of them right of the line A -> B) in place:
+# first the points right of A -> C, then the points right of C -> B, where C is the furthest
+# point from the line. The rest are inside the triangle ABC and are dropped. <orientations>
+# holds the orientation of each point to the line of the part it is in, and follows the
+# same moves, so the furthest point of a part is found without computing it again
+# Returns C and the end of the two parts
+def _quick_hull_partition(A, B, low, high, indices, orientations, x, y):
+    # A single point is C, on both new lines
+    if high - low == 1:
+        return int(indices[low]), low, low
+
+    part = indices[low:high].copy()
+    px, py = x[part], y[part]
+
+    # The furthest point to the line has the largest |orientation|
+    C = int(part[helpers.furthest_right_xy(x[A], y[A], x[B], y[B], px, py, orientations[low:high])])
+
+    A_C_orientations = helpers.ccw_xy(x[A], y[A], x[C], y[C], px, py)
+    C_B_orientations = helpers.ccw_xy(x[C], y[C], x[B], y[B], px, py)
+
+    # No point can be right of both lines, since C is the furthest one
+    is_A_C_right = A_C_orientations < 0
+    is_C_B_right = (C_B_orientations < 0) & ~is_A_C_right
+
+    A_C_end = low + int(np.count_nonzero(is_A_C_right))
+    C_B_end = A_C_end + int(np.count_nonzero(is_C_B_right))
+
+    indices[low:A_C_end] = part[is_A_C_right]
+    indices[A_C_end:C_B_end] = part[is_C_B_right]
+    orientations[low:A_C_end] = A_C_orientations[is_A_C_right]
+    orientations[A_C_end:C_B_end] = C_B_orientations[is_C_B_right]
+
+    return C, A_C_end, C_B_end
+
+# Quick hull over the indices of a PointSet, in the same (counter-clockwise) order as quick_hull
+#
+# Instead of recursing on new lists, the points outside the hull found so far are kept in
+# one index array, where the points right of each pending edge A -> B take a contiguous
+# range. Processing an edge partitions its range in place (see _quick_hull_partition), and
+# an explicit stack holds the pending edges and the vertices waiting to be output. Besides
+# the two arrays of n entries, the memory is the stack, with at most two entries per hull vertex
+def _quick_hull_indices(point_set):
+    n = len(point_set)
+
+    if n < 3:
+        return np.arange(n)
+
+    x, y = point_set.x, point_set.y
+
+    leftmost, lower = int(np.argmin(x)), int(np.argmin(y))
+    rightmost, upper = int(np.argmax(x)), int(np.argmax(y))
+    quadrangle = [leftmost, lower, rightmost, upper]
+
+    # Assign each point to the (only) edge of the quadrangle it is right of, the points
+    # inside the quadrangle get the label 4 and are dropped
+    labels = np.full(n, 4, dtype=np.int8)
+    all_orientations = np.zeros(n)
+
+    for edge in range(4):
+        A, B = quadrangle[edge], quadrangle[(edge + 1) % 4]
+        edge_orientations = helpers.ccw_xy(x[A], y[A], x[B], y[B], x, y)
+        is_right = (edge_orientations < 0) & (labels == 4)
+
+        labels[is_right] = edge
+        all_orientations[is_right] = edge_orientations[is_right]
+
+    edge_ends = np.cumsum(np.bincount(labels, minlength=5))[:4].tolist()
+    indices = np.argsort(labels, kind='stable')[:edge_ends[-1]]
+    orientations = all_orientations[indices]
+
+    # A stack entry (A, B, low, high) is the edge A -> B with its points in indices[low:high],
+    # and (A, -1, 0, 0) is the vertex A, to be output when popped
+    stack = []
+    for edge in range(3, -1, -1):
+        edge_start = edge_ends[edge - 1] if edge > 0 else 0
+
+        stack.append((quadrangle[edge], quadrangle[(edge + 1) % 4], edge_start, edge_ends[edge]))
+        stack.append((quadrangle[edge], -1, 0, 0))
+
+    hull = []
+
+    while stack:
+        A, B, low, high = stack.pop()
+
+        if B == -1:
+            # An extreme point may be extreme in two directions (e.g. leftmost and lower)
+            if not hull or hull[-1] != A:
+                hull.append(A)
+            continue
+
+        if low == high:
+            continue
+
+        C, A_C_end, C_B_end = _quick_hull_partition(A, B, low, high, indices, orientations, x, y)
+
+        stack.append((C, B, A_C_end, C_B_end))
+        stack.append((C, -1, 0, 0))
+        stack.append((A, C, low, A_C_end))
+
+    if len(hull) > 1 and hull[0] == hull[-1]:
+        hull.pop()
+
+    return np.array(hull, dtype=np.intp)
+
+# Weight balance of the dynamic hull tree: a subtree is rebuilt when one of its children
+# holds more than this share of its points
+DYNAMIC_HULL_BALANCE = 0.7
+
+# Node of the tree of DynamicConvexHull. The points (as (x, y) keys) are at the leaves, in
+# lexicographic order. An internal node keeps the largest key of its left subtree, to route
+# the updates, and the bridges of the hulls of its two subtrees: <upper> joins the upper hulls
+# (left subtree point first), <lower> joins the lower hulls (right subtree point first)
+class _DynamicHullNode:
+    __slots__ = ('left', 'right', 'size', 'key', 'upper', 'lower')
+
+    def __init__(self, key, left=None, right=None):
+        self.key = key
+        self.left = left
+        self.right = right
+        self.size = 1
+        self.upper = None
+        self.lower = None
+
+        if left is not None:
+            _update_dynamic_hull_node(self)
+
+# The lower hull is the upper hull of the points rotated by 180 degrees, which keeps the
+# orientations and reverses the lexicographic order. So every search below works on the
+# upper hull, and <sign> = -1 runs it on the lower one by swapping the children
+def _dynamic_hull_children(node, sign):
+    return (node.left, node.right) if sign > 0 else (node.right, node.left)
+
+def _dynamic_hull_bridge(node, sign):
+    return node.upper if sign > 0 else node.lower
+
+def _dynamic_hull_orientation(p, q, r):
+    return helpers.ccw_xy(p[0], p[1], q[0], q[1], r[0], r[1])
+
+# Tangent from point <p>, before every point of <node> (in the order of <sign>), to the upper
+# hull of <node>: the vertex t with no point above the line p -> t (the last one, if the line
+# touches more). The hull of a node is its first child's hull up to the bridge, then its
+# second child's hull from the bridge, so the bridge edge (a, b) tells in which child t is
+def _dynamic_hull_tangent(p, node, sign):
+    while node.left is not None:
+        a, b = _dynamic_hull_bridge(node, sign)
+        first, second = _dynamic_hull_children(node, sign)
+
+        node = second if _dynamic_hull_orientation(p, a, b) >= 0 else first
+
+    return node.key
+
+# Bridge of the upper hulls of <left> and <right>, where every point of <left> comes before
+# every point of <right> (in the order of <sign>), in O(log^2 n)
+# The left end is searched down <left>: at a node with bridge edge (a, b), b is past the left
+# end of the bridge exactly when a is above the line from b to its tangent point on <right>
+def _dynamic_hull_find_bridge(left, right, sign):
+    node = left
+
+    while node.left is not None:
+        a, b = _dynamic_hull_bridge(node, sign)
+        first, second = _dynamic_hull_children(node, sign)
+
+        q = _dynamic_hull_tangent(b, right, sign)
+        node = first if _dynamic_hull_orientation(b, q, a) > 0 else second
+
+    return node.key, _dynamic_hull_tangent(node.key, right, sign)
+
+# Recompute the size and the two bridges of an internal node from its children
+def _update_dynamic_hull_node(node):
+    node.size = node.left.size + node.right.size
+    node.upper = _dynamic_hull_find_bridge(node.left, node.right, 1)
+    node.lower = _dynamic_hull_find_bridge(node.right, node.left, -1)
+
+# Append to <out> the vertices of the upper hull of <node> between keys <low> and <high>
+# (None for no bound), in the order of <sign>. Only the nodes on the way to a reported vertex
+# are visited, so the whole hull costs O(h log n)
+def _dynamic_hull_collect(node, low, high, sign, out):
+    def before(p, q):
+        return p is None or q is None or (p <= q if sign > 0 else p >= q)
+
+    while node.left is not None:
+        a, b = _dynamic_hull_bridge(node, sign)
+        first, second = _dynamic_hull_children(node, sign)
+
+        if not before(low, a):
+            node = second
+            low = b if before(low, b) else low
+        elif not before(b, high):
+            node = first
+            high = a if before(a, high) else high
+        else:
+            _dynamic_hull_collect(first, low, a if before(a, high) else high, sign, out)
+            node, low = second, b if before(low, b) else low
+
+    if before(low, node.key) and before(node.key, high):
+        out.append(node.key)
+
+# Convex hull under insertions and deletions of points, after Overmars and van Leeuwen
+#
+# The points are kept in a weight-balanced leaf tree (rebuilt in parts, like a scapegoat tree),
+# where each internal node stores the bridges joining the hulls of its two subtrees. Nothing
+# else is stored: the hull of a node is implied by its children's hulls and its bridges, so a
+# bridge is found by binary searches down the two subtrees in O(log^2 n). An update recomputes
+# the bridges on its path to the root, in O(log^3 n) amortized, and hull() reports the h
+# vertices in O(h log n), independently of the number of points
+#
+# Equal points are stored once, with all their copies. hull() returns the inserted Point2D
+# objects counter-clockwise from the leftmost point, without collinear points on the edges
+class DynamicConvexHull:
+    def __init__(self, points=()):
+        self._root = None
+        self._size = 0
+
+        # All the inserted copies of each point, by (x, y)
+        self._copies = {}
+
+        for point in points:
+            self._copies.setdefault((point.x, point.y), []).append(point)
+            self._size += 1
+
+        if self._copies:
+            self._root = self._build(sorted(self._copies))
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, point):
+        return (point.x, point.y) in self._copies
+
+    def insert(self, point):
+        key = (point.x, point.y)
+        self._size += 1
+
+        if key in self._copies:
+            self._copies[key].append(point)
+            return
+
+        self._copies[key] = [point]
+        self._root = self._insert(self._root, key)
+
+    # Delete one copy of <point> (any point equal to it), ValueError if there is none
+    def delete(self, point):
+        key = (point.x, point.y)
+
+        if key not in self._copies:
+            raise ValueError(f"{point} is not in the hull structure")
+
+        self._size -= 1
+        copies = self._copies[key]
+        copies.pop()
+
+        if not copies:
+            del self._copies[key]
+            self._root = self._delete(self._root, key)
+
+    def hull(self):
+        if self._root is None:
+            return []
+
+        if self._root.left is None:
+            return [self._copies[self._root.key][0]]
+
+        upper, lower = [], []
+        _dynamic_hull_collect(self._root, None, None, 1, upper)
+        _dynamic_hull_collect(self._root, None, None, -1, lower)
+
+        # Lower hull from left to right, then upper hull from right to left
+        keys = lower[::-1] + upper[-2:0:-1]
+
+        # Drop the points in the middle of an edge, all of them but the two ends if the
+        # points are collinear
+        turns = [_dynamic_hull_orientation(keys[i - 1], keys[i], keys[(i + 1) % len(keys)]) for i in range(len(keys))]
+
+        if any(turns):
+            keys = [key for key, turn in zip(keys, turns) if turn != 0]
+        else:
+            keys = [keys[0], lower[0]]
+
+        return [self._copies[key][0] for key in keys]
+
+    # Balanced tree over sorted distinct keys
+    def _build(self, keys):
+        if len(keys) == 1:
+            return _DynamicHullNode(keys[0])
+
+        median = len(keys) // 2
+
+        return _DynamicHullNode(keys[median - 1], self._build(keys[:median]), self._build(keys[median:]))
+
+    def _leaves(self, node, keys):
+        if node.left is None:
+            keys.append(node.key)
+        else:
+            self._leaves(node.left, keys)
+            self._leaves(node.right, keys)
+
+        return keys
+
+    # Rebuild <node> if it is out of balance, otherwise recompute its bridges
+    def _rebalance(self, node):
+        if max(node.left.size, node.right.size) > DYNAMIC_HULL_BALANCE * (node.left.size + node.right.size):
+            return self._build(self._leaves(node, []))
+
+        _update_dynamic_hull_node(node)
+        return node
+
+    def _insert(self, node, key):
+        if node is None:
+            return _DynamicHullNode(key)
+
+        if node.left is None:
+            leaf = _DynamicHullNode(key)
+
+            if key < node.key:
+                return _DynamicHullNode(key, leaf, node)
+
+            return _DynamicHullNode(node.key, node, leaf)
+
+        if key <= node.key:
+            node.left = self._insert(node.left, key)
+        else:
+            node.right = self._insert(node.right, key)
+
+        return self._rebalance(node)
+
+    def _delete(self, node, key):
+        if node.left is None:
+            return None
+
+        if key <= node.key:
+            node.left = self._delete(node.left, key)
+
+            if node.left is None:
+                return node.right
+        else:
+            node.right = self._delete(node.right, key)
+
+            if node.right is None:
+                return node.left
+
+        return self._rebalance(node)
+
+# Hull of an append-only stream of points, fed in chunks, keeping only the current hull
+#
+# The hull vertices are kept sorted in two x-monotone chains, the upper and the lower one (as
+# in grahams_scan and monotone_chain). A new chunk is first tested against them, all at once:
+# the edges above and below each point are found by binary search, and the points between
+# them are dropped. Only the points left go through monotone_chain, together with the current
+# vertices, so the memory is O(h) plus the chunk being processed, however long the stream is
+# A chunk is an (N, 2) array, a PointSet or a list of Point2D objects
+class StreamingConvexHull:
+    def __init__(self):
+        self.points_seen = 0
+        self._vertices = np.empty((0, 2))
+        self._upper = self._vertices
+        self._lower = self._vertices
+
+    # Add the points of <chunk> and return the new hull (see hull())
+    def update(self, chunk):
+        if isinstance(chunk, list) and chunk and isinstance(chunk[0], helpers.Point2D):
+            chunk = helpers.PointSet.from_points(chunk)
+        elif not isinstance(chunk, helpers.PointSet):
+            chunk = helpers.PointSet(chunk)
+
+        self.points_seen += len(chunk)
+        outside = chunk.coords[self._outside(chunk.x, chunk.y)]
+
+        if len(outside) > 0:
+            candidates = np.concatenate((self._vertices, outside))
+            self._set_hull(candidates, monotone_chain(helpers.PointSet(candidates)))
+
+        return self.hull()
+
+    # The hull vertices as a PointSet, counter-clockwise from the leftmost point
+    def hull(self):
+        return helpers.PointSet(self._vertices)
+
+    # Mask of the points of a chunk that aren't inside (or on) the current hull
+    def _outside(self, x, y):
+        if len(self._vertices) < 3:
+            return np.ones(len(x), dtype=bool)
+
+        upper_x, upper_y = self._upper[:, 0], self._upper[:, 1]
+        lower_x, lower_y = self._lower[:, 0], self._lower[:, 1]
+
+        # Strictly between the ends, so that no vertical edge is involved
+        is_inside = (x > upper_x[0]) & (x < upper_x[-1])
+
+        upper_edge = np.clip(np.searchsorted(upper_x, x, side='right') - 1, 0, len(upper_x) - 2)
+        lower_edge = np.clip(np.searchsorted(lower_x, x, side='right') - 1, 0, len(lower_x) - 2)
+
+        is_inside &= helpers.ccw_xy(upper_x[upper_edge], upper_y[upper_edge],
+                                    upper_x[upper_edge + 1], upper_y[upper_edge + 1], x, y) <= 0
+        is_inside &= helpers.ccw_xy(lower_x[lower_edge], lower_y[lower_edge],
+                                    lower_x[lower_edge + 1], lower_y[lower_edge + 1], x, y) >= 0
+
+        return ~is_inside
+
+    # Keep the hull <hull> (monotone_chain indices into <candidates>) and split it in chains
+    def _set_hull(self, candidates, hull):
+        # monotone_chain goes clockwise from the leftmost point: upper chain first, then lower
+        rightmost = int(np.lexsort((candidates[hull, 1], candidates[hull, 0]))[-1])
+
+        self._upper = candidates[hull[:rightmost + 1]]
+        self._lower = candidates[np.append(hull[rightmost:], hull[0])[::-1]]
+        self._vertices = candidates[np.roll(hull[::-1], 1)]
+
+# Generator over the hulls of a stream: for each chunk of <chunks>, the hull of all the points
+# so far (see StreamingConvexHull)
+def streaming_hull(chunks):
+    stream = StreamingConvexHull()
+
+    for chunk in chunks:
+        yield stream.update(chunk)
+
+# One half chain for every group of a batch at once (see _monotone_half_chain). <xs>, <ys> are
+# sorted by (group, x, y) with the coinciding points of a group removed, <groups> gives the
+# group of each position and <firsts>, <lasts> the first and last position of each group.
+# Returns the chain positions, ordered by group and then from left to right
+def _batch_half_chains(xs, ys, groups, firsts, lasts, sign):
+    first, last = firsts[groups], lasts[groups]
+    positions = np.arange(len(xs))
+
+    # Only the points strictly on the chain's side of the line between the two ends of their
+    # group can be on it
+    orientations = helpers.ccw_xy(xs[first], ys[first], xs[last], ys[last], xs, ys) * sign
+    chain = np.flatnonzero((positions == first) | (positions == last) | (orientations > 0))
+
+    # Vectorized passes over the triples that lie in one group, until every chain is convex.
+    # A pass drops at least one point of every chain that isn't, so there are at most as many
+    # passes as points in the largest group, and no stack-based scan is needed
+    while len(chain) > 2:
+        chain_x, chain_y, chain_groups = xs[chain], ys[chain], groups[chain]
+
+        is_dropped = (chain_groups[:-2] == chain_groups[2:]) & \
+            (helpers.ccw_xy(chain_x[:-2], chain_y[:-2], chain_x[1:-1], chain_y[1:-1], chain_x[2:], chain_y[2:]) * sign >= 0)
+
+        if not is_dropped.any():
+            break
+
+        keep = np.ones(len(chain), dtype=bool)
+        keep[1:-1] = ~is_dropped
+        chain = chain[keep]
+
+    return chain
+
+# Largest padding (relative to the number of points) of the table sorted by _batch_order
+BATCH_HULL_MAX_PADDING = 4
+
+# Positions of a batch sorted by (group, x, y). The groups are already in order, so only the
+# x-coordinates of each group have to be sorted. When the groups have similar sizes, they are
+# laid out as the rows of a table padded with infinity, and the rows are sorted at once: small
+# sorts are much faster than a sort of the whole batch. Otherwise the x ranks are combined with
+# the group ids into one integer key. Only if a group has equal x-coordinates is a full
+# lexsort needed
+def _batch_order(x, y, groups, offsets, sizes):
+    n, largest = len(x), int(sizes.max(initial=0))
+
+    if len(sizes) * largest <= BATCH_HULL_MAX_PADDING * n:
+        table = np.full((len(sizes), largest), np.inf)
+        table[groups, np.arange(n) - offsets[groups]] = x
+        columns = np.argsort(table, axis=1)
+
+        order = (columns + offsets[:-1, None])[columns < sizes[:, None]]
+    else:
+        ranks = np.empty(n, dtype=np.int64)
+        ranks[np.argsort(x)] = np.arange(n)
+
+        order = np.argsort(groups.astype(np.int64) * n + ranks)
+
+    xs, sorted_groups = x[order], groups[order]
+
+    if ((xs[1:] == xs[:-1]) & (sorted_groups[1:] == sorted_groups[:-1])).any():
+        order = np.lexsort((y, x, groups))
+
+    return order
+
+# Hulls of the groups coords[offsets[g]:offsets[g + 1]] of one batch, see batch_hull
+def _batch_hull_block(coords, offsets):
+    sizes = np.diff(offsets)
+    groups = point_groups = np.repeat(np.arange(len(sizes)), sizes)
+    x, y = coords[:, 0], coords[:, 1]
+
+    # Sort by (group, x, y) and keep one copy of the coinciding points of a group
+    order = _batch_order(x, y, groups, offsets, sizes)
+    xs, ys, groups = x[order], y[order], groups[order]
+
+    is_distinct = np.ones(len(order), dtype=bool)
+    is_distinct[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1]) | (groups[1:] != groups[:-1])
+
+    if not is_distinct.all():
+        order, xs, ys, groups = order[is_distinct], xs[is_distinct], ys[is_distinct], groups[is_distinct]
+
+    distinct_sizes = np.bincount(groups, minlength=len(sizes))
+    lasts = np.cumsum(distinct_sizes) - 1
+    firsts = lasts - distinct_sizes + 1
+
+    upper = _batch_half_chains(xs, ys, groups, firsts, lasts, 1)
+    lower = _batch_half_chains(xs, ys, groups, firsts, lasts, -1)
+
+    # Each hull is its upper chain from left to right, then its lower chain from right to
+    # left without the two ends (which the upper chain already has)
+    lower = lower[(lower != firsts[groups[lower]]) & (lower != lasts[groups[lower]])]
+    hull = np.concatenate((upper, lower))
+    is_lower = np.arange(len(hull)) >= len(upper)
+    hull = hull[np.lexsort((np.where(is_lower, -hull, hull), is_lower, groups[hull]))]
+    hull_indices, hull_groups = order[hull], groups[hull]
+
+    # As monotone_chain does, a group of less than three points is its own hull, in input order
+    is_small = sizes < 3
+
+    if is_small.any():
+        small_points = np.flatnonzero(is_small[point_groups])
+        is_kept = ~is_small[hull_groups]
+
+        hull_indices = np.concatenate((hull_indices[is_kept], small_points))
+        hull_groups = np.concatenate((hull_groups[is_kept], point_groups[small_points]))
+
+        by_group = np.argsort(hull_groups, kind='stable')
+        hull_indices, hull_groups = hull_indices[by_group], hull_groups[by_group]
+
+    hull_offsets = np.zeros(len(sizes) + 1, dtype=np.intp)
+    np.cumsum(np.bincount(hull_groups, minlength=len(sizes)), out=hull_offsets[1:])
+
+    return hull_indices, hull_offsets
+
+# Hulls of many small point sets in one call
+#
+# The point sets are given as one ragged array: group g is coords[offsets[g]:offsets[g + 1]],
+# with <coords> an (N, 2) array or a PointSet. All the groups are sorted together by
+# (group, x, y) and run through the monotone chain together, so the Python work doesn't grow
+# with the number of groups. With <workers> set, the groups are split in that many blocks of
+# about the same number of points, solved in a process pool
+#
+# Returns the hulls in the same ragged form: hull_indices[hull_offsets[g]:hull_offsets[g + 1]]
+# are the indices (into <coords>) of the hull of group g, in the order of monotone_chain (so a
+# group of less than three points comes back whole, in input order)
+def batch_hull(coords, offsets, workers=None):
+    if isinstance(coords, helpers.PointSet):
+        coords = coords.coords
+    else:
+        coords = helpers.PointSet(coords).coords
+
+    offsets = np.asarray(offsets, dtype=np.intp)
+
+    if len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(coords) or (np.diff(offsets) < 0).any():
+        raise ValueError("offsets must go from 0 to the number of points, without decreasing")
+
+    groups = len(offsets) - 1
+
+    if workers is None or workers <= 1 or groups < 2:
+        return _batch_hull_block(coords, offsets)
+
+    # Blocks of whole groups, split at the group boundaries closest to equal point counts
+    bounds = np.searchsorted(offsets, np.linspace(0, len(coords), workers + 1), side='left')
+    bounds = np.unique(np.clip(bounds, 0, groups))
+    bounds[0], bounds[-1] = 0, groups
+
+    blocks = [(offsets[start], offsets[start:end + 1] - offsets[start]) for start, end in zip(bounds[:-1], bounds[1:])]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(blocks))) as executor:
+        results = list(executor.map(_batch_hull_block, [coords[start:start + block_offsets[-1]] for start, block_offsets in blocks],
+                                    [block_offsets for _, block_offsets in blocks]))
+
+    hull_indices = np.concatenate([block_hull + start for (start, _), (block_hull, _) in zip(blocks, results)])
+    hull_sizes = np.concatenate([np.diff(block_hull_offsets) for _, block_hull_offsets in results])
+    hull_offsets = np.zeros(groups + 1, dtype=np.intp)
+    np.cumsum(hull_sizes, out=hull_offsets[1:])
+
+    return hull_indices, hull_offsets
 
 if __name__ == "__main__":
     points = [helpers.Point2D(2, 8),
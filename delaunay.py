@@ -1,23 +1,298 @@
 import numpy as np
 from scipy.spatial import Delaunay, delaunay_plot_2d
 import matplotlib.pyplot as plt
-from helpers import create_gif_by_frames
+from helpers import create_gif_by_frames, orientation, in_circle, CCW_ERROR_BOUND
+from fractions import Fraction
 import time
 
+# Vertex of the ghost triangles of IncrementalDelaunay, the point at infinity
+INFINITE_VERTEX = -1
+
+# Seed of the random order in which IncrementalDelaunay inserts its initial points
+INCREMENTAL_DELAUNAY_SEED = 0
+
+# Incremental Delaunay triangulation: every point is inserted into the current triangulation,
+# by splitting the triangle (or the edge) that holds it and flipping the edges that become
+# illegal (Lawson), so an insertion only changes the triangles around the new point
+#
+# Triangle t has the vertices _vertices[t] (counter-clockwise) and _neighbors[t][i] is the
+# triangle across the edge opposite of its i-th vertex. The outside of the convex hull is
+# covered by ghost triangles (u, v, INFINITE_VERTEX), one per hull edge u -> v (the outside on
+# its left), so the hull needs no special case: a point outside of it splits a ghost, and a
+# ghost is in conflict with a point on the outer side of its edge (its "circumcircle" is that
+# half-plane)
+#
+# The triangles destroyed by splits and flips are kept as the nodes of a history DAG, each one
+# pointing to the triangles that replaced it, and a point is located by going down the DAG
+# from its roots (the first triangle and its ghosts). The two triangles of a flip are replaced
+# by the two on either side of the new edge, so going down from them only takes the side of
+# the point to that edge (_diagonals). The regions of the triangles alive at
+# any time partition the plane: a triangle is its closed area and a ghost the part outside of
+# its edge of the wedge seen from <center> (a point strictly inside of the first triangle,
+# so of every hull) between the ends of its edge. So the children of a node cover its region,
+# and with the points inserted in random order the expected location cost is O(log n), as is
+# the expected number of flips per insertion (O(1))
+#
+# The predicates are exact (see helpers.orientation and helpers.in_circle), so any input works,
+# collinear or cocircular points included. Repeated points are kept in <points> but only one of
+# them is a vertex of the triangulation, and the triangles only appear once three of the points
+# are not collinear
 class IncrementalDelaunay:
+    # <points> is an (N, 2) array-like of the initial points, inserted in random order
     def __init__(self, points):
-        self.points = points
-        
-        # Create first triangle
-        self.tri = Delaunay(points[:3])
-        self.simplices = self.tri.simplices.copy()
-        
-        # Add point to the Delaunay set of points and compute triangulation
-        # for the updated set 
+        self._x, self._y = [], []
+        self._vertices, self._neighbors, self._children, self._diagonals = [], [], [], []
+        self._roots = []
+        self._pending = []
+        self.center = None
+        self._cache = None
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self._x += points[:, 0].tolist()
+        self._y += points[:, 1].tolist()
+
+        for vertex in np.random.default_rng(INCREMENTAL_DELAUNAY_SEED).permutation(len(points)).tolist():
+            self._insert(vertex)
+
+    # The points, as an (N, 2) array
+    @property
+    def points(self):
+        return self._arrays()[0]
+
+    # The triangles, as an (M, 3) array of indices of <points> (counter-clockwise)
+    @property
+    def simplices(self):
+        return self._arrays()[1]
+
+    def _arrays(self):
+        if self._cache is None:
+            triangles = [vertices for vertices, children in zip(self._vertices, self._children)
+                         if children is None and vertices[2] != INFINITE_VERTEX]
+
+            self._cache = (np.column_stack((self._x, self._y)).reshape(-1, 2), np.array(triangles, dtype=np.intp).reshape(-1, 3))
+
+        return self._cache
+
+    # Add <point> to the Delaunay set of points and update the triangulation. Returns its index
     def add_point(self, point):
-        self.points = np.append(self.points, [point], axis=0)
-        self.tri = Delaunay(self.points)
-        self.simplices = self.tri.simplices.copy()
+        self._x.append(float(point[0]))
+        self._y.append(float(point[1]))
+        self._insert(len(self._x) - 1)
+
+        return len(self._x) - 1
+
+    # Orientation of the vertices <a>, <b> and the point (<x>, <y>), as helpers.orientation, with
+    # its float filter inlined (this is most of the work of an insertion)
+    def _orientation(self, a, b, x, y):
+        x0, y0, x1, y1 = self._x[a], self._y[a], self._x[b], self._y[b]
+        det_left = (x0 - x) * (y1 - y)
+        det_right = (y0 - y) * (x1 - x)
+        det = det_left - det_right
+
+        if abs(det) >= CCW_ERROR_BOUND * (abs(det_left) + abs(det_right)):
+            return det
+
+        return orientation(x0, y0, x1, y1, x, y)
+
+    # Whether the region of triangle <t> (see above) holds the point (<x>, <y>)
+    def _contains(self, t, x, y):
+        a, b, c = self._vertices[t]
+
+        if (c == INFINITE_VERTEX):
+            center_x, center_y = self.center
+            return (self._orientation(a, b, x, y) >= 0 and
+                    orientation(center_x, center_y, self._x[b], self._y[b], x, y) >= 0 and
+                    orientation(center_x, center_y, self._x[a], self._y[a], x, y) <= 0)
+
+        return self._orientation(a, b, x, y) >= 0 and self._orientation(b, c, x, y) >= 0 and self._orientation(c, a, x, y) >= 0
+
+    # Whether triangle <t> is in conflict with the point (<x>, <y>): the point is strictly inside
+    # of its circumcircle, or strictly outside of the hull edge of a ghost
+    def _is_conflict(self, t, x, y):
+        a, b, c = self._vertices[t]
+
+        if (c == INFINITE_VERTEX):
+            return self._orientation(a, b, x, y) > 0
+
+        return in_circle(self._x[a], self._y[a], self._x[b], self._y[b], self._x[c], self._y[c], x, y) > 0
+
+    # Alive triangle whose region holds the point (<x>, <y>), found down the history DAG
+    def _locate(self, x, y):
+        candidates = self._roots
+
+        while True:
+            for t in candidates:
+                if self._contains(t, x, y):
+                    break
+            else:
+                raise RuntimeError("IncrementalDelaunay: point location failed")
+
+            # Flipped triangles, whose children are on the left and on the right of a diagonal
+            while self._diagonals[t] is not None:
+                a, b = self._diagonals[t]
+                t = self._children[t][0 if self._orientation(a, b, x, y) >= 0 else 1]
+
+            if self._children[t] is None:
+                return t
+
+            candidates = self._children[t]
+
+    # New triangle (<a>, <b>, <c>), rotated so that the infinite vertex of a ghost comes last
+    def _new_triangle(self, a, b, c):
+        if (a == INFINITE_VERTEX):
+            a, b, c = b, c, a
+        elif (b == INFINITE_VERTEX):
+            a, b, c = c, a, b
+
+        self._vertices.append((a, b, c))
+        self._neighbors.append([-1, -1, -1])
+        self._children.append(None)
+        self._diagonals.append(None)
+
+        return len(self._children) - 1
+
+    # Position in triangle <t> of the edge <a> -> <b> (the position of its opposite vertex),
+    # None if <t> has no such edge
+    def _edge(self, t, a, b):
+        vertices = self._vertices[t]
+
+        if a not in vertices:
+            return None
+
+        i = vertices.index(a)
+        return (i + 2) % 3 if vertices[(i + 1) % 3] == b else None
+
+    # Replace the alive triangles <old> by the <new> ones, given as vertex triples, linking the
+    # new ones to each other and to the triangles around <old>. Returns the new triangles
+    def _replace(self, old, new):
+        new = [self._new_triangle(*vertices) for vertices in new]
+        edges = {}
+
+        for t in new:
+            a, b, c = self._vertices[t]
+            edges[b, c], edges[c, a], edges[a, b] = (t, 0), (t, 1), (t, 2)
+
+        for (a, b), (t, i) in edges.items():
+            if (b, a) in edges:
+                self._neighbors[t][i] = edges[b, a][0]
+                continue
+
+            # An edge of the boundary, which was an edge of one of the old triangles
+            for s in old:
+                j = self._edge(s, a, b)
+
+                if j is not None:
+                    outer = self._neighbors[s][j]
+                    self._neighbors[t][i] = outer
+                    self._neighbors[outer][self._edge(outer, b, a)] = t
+                    break
+
+        for s in old:
+            self._children[s] = new
+
+        return new
+
+    # Insert the point with index <p> and restore the Delaunay property around it
+    def _insert(self, p):
+        x, y = self._x[p], self._y[p]
+        self._cache = None
+
+        if self.center is None:
+            self._start(p)
+            return
+
+        t = self._locate(x, y)
+        vertices = self._vertices[t]
+
+        # A repeated point is not a vertex
+        if any(v != INFINITE_VERTEX and self._x[v] == x and self._y[v] == y for v in vertices):
+            return
+
+        # The point is on an edge of the triangle if it's collinear with it (for a ghost, with
+        # its hull edge only): both triangles of the edge are split in two
+        edge = None
+        for i in range(3):
+            a, b = vertices[i], vertices[(i + 1) % 3]
+
+            if a != INFINITE_VERTEX and b != INFINITE_VERTEX and self._orientation(a, b, x, y) == 0:
+                edge = i
+                break
+
+        if edge is None:
+            a, b, c = vertices
+            new = self._replace([t], [(a, b, p), (b, c, p), (c, a, p)])
+        else:
+            a, b, c = vertices[edge], vertices[(edge + 1) % 3], vertices[(edge + 2) % 3]
+            s = self._neighbors[t][(edge + 2) % 3]
+            d = [v for v in self._vertices[s] if v != a and v != b][0]
+            new = self._replace([t, s], [(a, p, c), (p, b, c), (b, p, d), (p, a, d)])
+
+        self._legalize(p, new)
+
+    # Flip the illegal edges opposite of <p> in the triangles <stack> (and in the triangles
+    # that the flips create), until every edge around <p> is legal
+    def _legalize(self, p, stack):
+        x, y = self._x[p], self._y[p]
+        stack = list(stack)
+
+        while stack:
+            t = stack.pop()
+            vertices = self._vertices[t]
+            i = vertices.index(p)
+            s = self._neighbors[t][i]
+
+            if not self._is_conflict(s, x, y):
+                continue
+
+            # Flip the edge a -> b, shared with the triangle (b, a, q) across it
+            a, b = vertices[(i + 1) % 3], vertices[(i + 2) % 3]
+            q = [v for v in self._vertices[s] if v != a and v != b][0]
+            stack += self._replace([t, s], [(a, q, p), (q, b, p)])
+            self._diagonals[t] = self._diagonals[s] = (q, p)
+
+    # Start the triangulation with the point with index <p>: the points wait (all on one line)
+    # until one of them makes a triangle with two others, which is built with its ghosts, and
+    # the waiting points are inserted into it
+    def _start(self, p):
+        x, y = self._x[p], self._y[p]
+        first = self._pending[0] if self._pending else p
+        second = next((v for v in self._pending if self._x[v] != self._x[first] or self._y[v] != self._y[first]), None)
+
+        if second is None or self._orientation(first, second, x, y) == 0:
+            self._pending.append(p)
+            return
+
+        a, b, c = (first, second, p) if self._orientation(first, second, x, y) > 0 else (second, first, p)
+        self.center = self._inner_point(a, b, c)
+
+        # The first triangle and its ghosts, across its edges b -> a, c -> b and a -> c
+        triangle = self._new_triangle(a, b, c)
+        ghosts = [self._new_triangle(b, a, INFINITE_VERTEX), self._new_triangle(c, b, INFINITE_VERTEX),
+                  self._new_triangle(a, c, INFINITE_VERTEX)]
+        self._roots = [triangle] + ghosts
+
+        self._neighbors[triangle] = [ghosts[1], ghosts[2], ghosts[0]]
+        self._neighbors[ghosts[0]] = [ghosts[2], ghosts[1], triangle]
+        self._neighbors[ghosts[1]] = [ghosts[0], ghosts[2], triangle]
+        self._neighbors[ghosts[2]] = [ghosts[1], ghosts[0], triangle]
+
+        pending, self._pending = self._pending, []
+
+        for v in pending:
+            if v != first and v != second:
+                self._insert(v)
+
+    # A point strictly inside of the counter-clockwise triangle of vertices <a>, <b>, <c>: its
+    # centroid, computed exactly when the rounded one isn't strictly inside (very thin triangles)
+    def _inner_point(self, a, b, c):
+        x = (self._x[a] + self._x[b] + self._x[c]) / 3
+        y = (self._y[a] + self._y[b] + self._y[c]) / 3
+
+        if all(self._orientation(u, v, x, y) > 0 for u, v in ((a, b), (b, c), (c, a))):
+            return x, y
+
+        return ((Fraction(self._x[a]) + Fraction(self._x[b]) + Fraction(self._x[c])) / 3,
+                (Fraction(self._y[a]) + Fraction(self._y[b]) + Fraction(self._y[c])) / 3)
 
     def solve(self, new_points):
         for step, point in enumerate(new_points, start=1):
@@ -39,7 +314,7 @@ class IncrementalDelaunay:
 
         ax.scatter(x_points, y_points, color='blue', label='Points')
 
-        fig = delaunay_plot_2d(delaunay, ax=ax)
+        fig = delaunay_plot_2d(self, ax=ax)
         file_name = f"step_{step:03d}.png"
         plt.savefig(file_name)
         plt.close()
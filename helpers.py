@@ -2,24 +2,23 @@ import numpy as np
 import random
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-from math import sqrt
+from math import sqrt, lcm
+from fractions import Fraction
 import imageio
 import os
 
 # Class for representing 2D points
 class Point2D:
+    # Fixed attribute layout, so that large lists of points (and the views handed
+    # out by PointSet) don't carry a per-object __dict__
+    # The clockwise and counter-clockwise neighbors needed by the divide and conquer
+    # merge are kept in per-call lists (see convex_hull.convex_hulls_merge), not here
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
-        # Nearest points in a clockwise and counter-clockwise direction
-        # These references are useful in order to implement the merge method
-        # needed by divide and conquer method in linear time. Otherwise
-        # each time a neighbor is needed, the elapsed time to find the 
-        # clockwise or counter-clockwise nearest neighbor would be O(n)
-        self.cw_next = None
-        self.ccw_next = None
-
     # Overwrite __repr__ function in order to print a 2D-Point
     def __repr__(self):
         return "(" + str(self.x) + ", " + str(self.y) + ")"
@@ -44,6 +43,67 @@ class Point2D:
     def get_y(self):
         return self.y
 
+# Class for representing a set of 2D points in columnar form
+# The coordinates are kept in a single (N, 2) float64 array, so no per-point object
+# is allocated. Algorithms that accept a PointSet return indices into it instead of
+# lists of Point2D objects
+class PointSet:
+    __slots__ = ('coords',)
+
+    def __init__(self, coords):
+        coords = np.ascontiguousarray(coords, dtype=np.float64)
+
+        if coords.size == 0:
+            coords = coords.reshape(0, 2)
+
+        if coords.ndim != 2 or coords.shape[1] != 2:
+            raise ValueError("PointSet expects an (N, 2) array of coordinates")
+
+        self.coords = coords
+
+    # Build a point set from a list of Point2D objects (or anything with x, y attributes)
+    @classmethod
+    def from_points(cls, points):
+        coords = np.empty((len(points), 2), dtype=np.float64)
+        coords[:, 0] = [point.x for point in points]
+        coords[:, 1] = [point.y for point in points]
+
+        return cls(coords)
+
+    def __len__(self):
+        return self.coords.shape[0]
+
+    # An integer index gives a Point2D view of that point, anything else
+    # (slice, index array, boolean mask) gives a new PointSet
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            x, y = self.coords[index]
+            return Point2D(float(x), float(y))
+
+        return PointSet(self.coords[index])
+
+    def __iter__(self):
+        for x, y in self.coords.tolist():
+            yield Point2D(x, y)
+
+    def __repr__(self):
+        return "PointSet(" + str(len(self)) + " points)"
+
+    # Getters for the coordinate columns (views, not copies)
+    @property
+    def x(self):
+        return self.coords[:, 0]
+
+    @property
+    def y(self):
+        return self.coords[:, 1]
+
+    # Convert the whole set, or the points at <indices>, to a list of Point2D objects
+    def to_points(self, indices=None):
+        coords = self.coords if indices is None else self.coords[indices]
+
+        return [Point2D(x, y) for x, y in coords.tolist()]
+
 # Orientation Predicate using determinant
 '''
 In order to compute the orientation predicate, we must compute the determinant : 
@@ -51,9 +111,335 @@ In order to compute the orientation predicate, we must compute the determinant :
 | 1 x1 y1 | = 1*(x1*y2 - y1 * x2) - x0 * (1*y2 - y1 * 1) + y0 * (1*x2 - x1 * 1) = x0 * (y1 - y2) + x1 * (y2 - y0) + x2 * (y0 - y1)  
 | 1 x2 y2 |
                                                                                  
+Equivalently, translating <p2> to the origin : (x0 - x2) * (y1 - y2) - (y0 - y2) * (x1 - x2)
+
+In floating point the determinant may get the wrong sign when the points are (nearly) collinear,
+so it is evaluated adaptively, as in Shewchuk's orient2d: the float result is returned when it
+is larger than a bound on its rounding error, which is the case for all but (nearly) degenerate
+triples, and only otherwise is it computed exactly, with Shewchuk's error-free transformations
+(vectorized over the undecided entries of NumPy arrays). The sign is always exact
 '''
 def ccw(p0, p1, p2):
-    return p0.x * (p1.y - p2.y) + p1.x * (p2.y-p0.y) + p2.x * (p0.y - p1.y)
+    return orientation(p0.x, p0.y, p1.x, p1.y, p2.x, p2.y)
+
+# Relative error bound of the float determinant, (3 + 16 eps) eps for eps = 2^-53
+#
+# The bound is relative to |det_left| + |det_right|, which is max(|det_left + det_right|, |det|).
+# So the filter only has to compare |det| with the bound times |det_left + det_right|: when the
+# two products have opposite signs (or one is 0) that is at most |det| and the float sign is
+# right (they can't cancel), and otherwise it is the sum Shewchuk's orient2d bounds
+CCW_ERROR_BOUND = (3.0 + 16.0 * 2.0**-53) * 2.0**-53
+
+# Exact determinant with rational arithmetic (floats convert to Fractions exactly)
+def _exact_determinant(x0, y0, x1, y1, x2, y2):
+    x2, y2 = Fraction(x2), Fraction(y2)
+
+    return (Fraction(x0) - x2) * (Fraction(y1) - y2) - (Fraction(y0) - y2) * (Fraction(x1) - x2)
+
+# Exact determinant with Fractions, as a float of the same sign
+def _fraction_orientation(x0, y0, x1, y1, x2, y2):
+    det = _exact_determinant(x0, y0, x1, y1, x2, y2)
+
+    if det == 0:
+        return 0.0
+
+    # Keep the sign even if the value is too small for a float
+    return float(det) or (5e-324 if det > 0 else -5e-324)
+
+# Error-free transformations of Shewchuk ("Adaptive Precision Floating-Point Arithmetic and
+# Fast Robust Geometric Predicates"): the rounded result of an operation and its rounding
+# error, whose sum is the exact result. They work on floats and on NumPy arrays alike
+def _two_sum(a, b):
+    s = a + b
+    b_virtual = s - a
+    a_virtual = s - b_virtual
+
+    return s, (a - a_virtual) + (b - b_virtual)
+
+# Multiplier that splits a float into two halves of 26 bits (Dekker's split)
+EXACT_SPLITTER = 2.0**27 + 1.0
+
+def _two_product(a, b):
+    p = a * b
+
+    c = EXACT_SPLITTER * a
+    a_high = c - (c - a)
+    a_low = a - a_high
+
+    c = EXACT_SPLITTER * b
+    b_high = c - (c - b)
+    b_low = b - b_high
+
+    return p, ((a_high * b_high - p) + a_high * b_low + a_low * b_high) + a_low * b_low
+
+# Exact sum of the <terms> as an expansion (Grow-Expansion): a list of components whose sum is
+# exact, nonoverlapping and of increasing magnitude, zeros aside. The same number of
+# components for every entry of arrays
+def _expansion_sum(terms):
+    expansion = []
+
+    for term in terms:
+        for i, component in enumerate(expansion):
+            term, expansion[i] = _two_sum(term, component)
+
+        expansion.append(term)
+
+    return expansion
+
+# Float value of an expansion, summed from its smallest component. Each component is
+# larger than all the smaller ones together, so the sign is exact
+def _expansion_value(expansion):
+    value = expansion[0]
+
+    for component in expansion[1:]:
+        value = value + component
+
+    return value
+
+# Magnitudes (besides 0) of the coordinate differences and of their rounding errors for which
+# the transformations are exact: no product overflows and no product error underflows
+EXACT_MIN_MAGNITUDE = 2.0**-450
+EXACT_MAX_MAGNITUDE = 2.0**450
+
+# Whether the nonzero <parts> (arrays or floats) are all in the range of the exact transformations
+def _is_exact_range(parts):
+    is_exact_range = True
+
+    for part in parts:
+        magnitude = abs(part)
+        is_exact_range = is_exact_range & (magnitude <= EXACT_MAX_MAGNITUDE) & ((magnitude >= EXACT_MIN_MAGNITUDE) | (part == 0))
+
+    return is_exact_range
+
+# The differences a, b, c, d of the orientation determinant a * b - c * d, each as a float and
+# its rounding error, whether the floats are in the range of the exact transformations and
+# whether the rounding errors are all 0. A rounding error is below its float, so only the
+# range of the errors that aren't 0 is left to check
+def _orientation_differences(x0, y0, x1, y1, x2, y2):
+    differences = [_two_sum(x0, -x2), _two_sum(y1, -y2), _two_sum(y0, -y2), _two_sum(x1, -x2)]
+    is_exact_range = _is_exact_range([value for value, _ in differences])
+    is_exact_difference = True
+
+    for _, error in differences:
+        is_exact_difference = is_exact_difference & (error == 0)
+
+    if not np.all(is_exact_difference):
+        is_exact_range = is_exact_range & (is_exact_difference | _is_exact_range([error for _, error in differences]))
+
+    return differences, is_exact_range, is_exact_difference
+
+# Exact orientation determinant as an expansion, from its <differences>. When their rounding
+# errors are all 0 (<is_exact_difference>), as for close or integer coordinates, the
+# determinant is the sum of the two products and their errors. Otherwise every part of a
+# difference is multiplied by every part of the other one, 16 terms in all
+def _orientation_expansion(differences, is_exact_difference):
+    if is_exact_difference:
+        differences = [(value,) for value, _ in differences]
+
+    a, b, c, d = differences
+    terms = []
+
+    for left, right, sign in ((a, b, 1.0), (c, d, -1.0)):
+        for left_part in left:
+            for right_part in right:
+                product, error = _two_product(left_part, right_part)
+                terms += [sign * error, sign * product]
+
+    return _expansion_sum(terms)
+
+# Exact orientations of 1D arrays of <differences> with rounding errors all 0, as floats of the
+# same sign. Where both products are exact too, as for small integer coordinates, their
+# difference has the sign of the determinant already, and the expansion is left to the others
+def _exact_difference_orientations(differences):
+    (a, _), (b, _), (c, _), (d, _) = differences
+    left, left_error = _two_product(a, b)
+    right, right_error = _two_product(c, d)
+    det = left - right
+    is_inexact = (left_error != 0) | (right_error != 0)
+
+    if is_inexact.any():
+        terms = [left_error[is_inexact], left[is_inexact], -right_error[is_inexact], -right[is_inexact]]
+        det[is_inexact] = _expansion_value(_expansion_sum(terms))
+
+    return det
+
+# Exact orientation on scalar coordinates, as a float of the same sign (and almost the same
+# value). A float is n / 2^k (and ints, Fractions and NumPy numbers are ratios of integers too),
+# so scaled to a common denominator the coordinates are Python integers, whose arithmetic is
+# exact and much cheaper than with Fractions (and, one entry at a time, than the float
+# expansions). Anything else, like 0-d arrays, goes through Fractions
+def _exact_orientation(x0, y0, x1, y1, x2, y2):
+    try:
+        ratios = (x0.as_integer_ratio(), y0.as_integer_ratio(), x1.as_integer_ratio(),
+                  y1.as_integer_ratio(), x2.as_integer_ratio(), y2.as_integer_ratio())
+    except AttributeError:
+        return _fraction_orientation(*(value.item() if isinstance(value, np.ndarray) else value for value in (x0, y0, x1, y1, x2, y2)))
+
+    scale = lcm(*[denominator for _, denominator in ratios])
+
+    if scale == 1:
+        x0, y0, x1, y1, x2, y2 = [numerator for numerator, _ in ratios]
+    else:
+        x0, y0, x1, y1, x2, y2 = [numerator * (scale // denominator) for numerator, denominator in ratios]
+
+    det = (x0 - x2) * (y1 - y2) - (y0 - y2) * (x1 - x2)
+
+    if det == 0:
+        return 0.0
+
+    return det / (scale * scale) or (5e-324 if det > 0 else -5e-324)
+
+# Exact orientations of the triples of 1D arrays, as floats of the same sign. The entries with
+# exact differences and the others are computed apart, each group at once, and the few out of
+# the exact range one by one
+def _exact_orientations(x0, y0, x1, y1, x2, y2):
+    differences, is_exact_range, is_exact_difference = _orientation_differences(x0, y0, x1, y1, x2, y2)
+
+    # Most often all the entries are in a single group, which is then computed without copies
+    if is_exact_range.all() and is_exact_difference.all():
+        return _exact_difference_orientations(differences)
+
+    det = np.empty(len(x0))
+    group = is_exact_range & is_exact_difference
+
+    if group.any():
+        det[group] = _exact_difference_orientations([(value[group], error[group]) for value, error in differences])
+
+    group = is_exact_range & ~is_exact_difference
+
+    if group.any():
+        group_differences = [(value[group], error[group]) for value, error in differences]
+        det[group] = _expansion_value(_orientation_expansion(group_differences, False))
+
+    for i in np.flatnonzero(~is_exact_range).tolist():
+        det[i] = _exact_orientation(*(float(value[i]) for value in (x0, y0, x1, y1, x2, y2)))
+
+    return det
+
+# Orientation predicate on scalar coordinates: positive for a left turn (counter-clockwise),
+# negative for a right turn, zero for collinear points, with the float filter described above
+def orientation(x0, y0, x1, y1, x2, y2):
+    det_left = (x0 - x2) * (y1 - y2)
+    det_right = (y0 - y2) * (x1 - x2)
+    det = det_left - det_right
+
+    if abs(det) >= CCW_ERROR_BOUND * abs(det_left + det_right):
+        return det
+
+    return _exact_orientation(x0, y0, x1, y1, x2, y2)
+
+# Same orientation predicate on raw coordinates. Any of the arguments may be NumPy
+# arrays, so one call evaluates the predicate for a whole batch of points. The filter is
+# vectorized too, and only the entries it can't decide are computed exactly, all at once
+def ccw_xy(x0, y0, x1, y1, x2, y2):
+    det_left = (x0 - x2) * (y1 - y2)
+    det_right = (y0 - y2) * (x1 - x2)
+    det = det_left - det_right
+
+    # Scalars are filtered here directly, since this is called once per step of the hull loops
+    if not isinstance(det, np.ndarray):
+        if abs(det) >= CCW_ERROR_BOUND * abs(det_left + det_right):
+            return det
+
+        return _exact_orientation(x0, y0, x1, y1, x2, y2)
+
+    if det.dtype != np.float64:
+        return ccw_xy(*(np.asarray(value, dtype=np.float64) for value in (x0, y0, x1, y1, x2, y2)))
+
+    error_bound = np.abs(det_left + det_right)
+    error_bound *= CCW_ERROR_BOUND
+    is_uncertain = np.abs(det) < error_bound
+
+    if np.count_nonzero(is_uncertain):
+        coordinates = [np.broadcast_to(value, det.shape)[is_uncertain] for value in (x0, y0, x1, y1, x2, y2)]
+
+        det[is_uncertain] = _exact_orientations(*coordinates)
+
+    return det
+
+# Position of the point (<px>, <py>) furthest right of the line (x0, y0) -> (x1, y1), given
+# its <orientations> from ccw_xy (the most negative one). Orientations closer to the smallest
+# than their rounding errors are compared exactly, so the point is the furthest one even
+# among nearly collinear points, as quick hull needs. The first one is taken among equals
+#
+# The candidates are compared with the one of smallest float orientation by the exact sign of
+# the difference of their orientation expansions, all at once. Only the candidates found
+# smaller are kept, and compared with the smallest of them, until there are none
+def furthest_right_xy(x0, y0, x1, y1, px, py, orientations):
+    if len(orientations) == 1:
+        return 0
+
+    error_bound = np.abs((x0 - px) * (y1 - py)) + np.abs((y0 - py) * (x1 - px))
+    error_bound *= CCW_ERROR_BOUND
+
+    candidates = (orientations - error_bound <= (orientations + error_bound).min()).nonzero()[0]
+
+    if len(candidates) == 1:
+        return int(candidates[0])
+
+    cx, cy = px[candidates], py[candidates]
+    differences, is_exact_range, is_exact_difference = _orientation_differences(x0, y0, x1, y1, cx, cy)
+
+    if not is_exact_range.all():
+        return int(min(candidates, key=lambda i: _exact_determinant(px[i], py[i], x0, y0, x1, y1)))
+
+    expansion = _orientation_expansion(differences, is_exact_difference.all())
+
+    while True:
+        smallest = int(np.argmin(_expansion_value(expansion)))
+        signs = _expansion_value(_expansion_sum(expansion + [-component[smallest] for component in expansion]))
+
+        if not (signs < 0).any():
+            return int(candidates[np.flatnonzero(signs == 0)[0]])
+
+        is_smaller = signs < 0
+        candidates = candidates[is_smaller]
+        expansion = [component[is_smaller] for component in expansion]
+
+# In-circle predicate, positive when (<x3>, <y3>) is inside the circle through the
+# counter-clockwise triangle (x0, y0), (x1, y1), (x2, y2), negative outside and zero on it.
+# Translating the fourth point to the origin, it is the determinant
+#
+# | x0 - x3   y0 - y3   (x0 - x3)^2 + (y0 - y3)^2 |
+# | x1 - x3   y1 - y3   (x1 - x3)^2 + (y1 - y3)^2 |
+# | x2 - x3   y2 - y3   (x2 - x3)^2 + (y2 - y3)^2 |
+#
+# with the same adaptive filter as orientation (Shewchuk's incircle bound): the float result
+# when it is larger than its rounding error, the exact one with Fractions otherwise
+INCIRCLE_ERROR_BOUND = (10.0 + 96.0 * 2.0**-53) * 2.0**-53
+
+def _exact_in_circle(x0, y0, x1, y1, x2, y2, x3, y3):
+    x3, y3 = Fraction(x3), Fraction(y3)
+    dx0, dy0 = Fraction(x0) - x3, Fraction(y0) - y3
+    dx1, dy1 = Fraction(x1) - x3, Fraction(y1) - y3
+    dx2, dy2 = Fraction(x2) - x3, Fraction(y2) - y3
+
+    det = ((dx0 * dx0 + dy0 * dy0) * (dx1 * dy2 - dx2 * dy1) + (dx1 * dx1 + dy1 * dy1) * (dx2 * dy0 - dx0 * dy2) +
+           (dx2 * dx2 + dy2 * dy2) * (dx0 * dy1 - dx1 * dy0))
+
+    if det == 0:
+        return 0.0
+
+    return float(det) or (5e-324 if det > 0 else -5e-324)
+
+def in_circle(x0, y0, x1, y1, x2, y2, x3, y3):
+    dx0, dy0 = x0 - x3, y0 - y3
+    dx1, dy1 = x1 - x3, y1 - y3
+    dx2, dy2 = x2 - x3, y2 - y3
+
+    dx1dy2, dx2dy1 = dx1 * dy2, dx2 * dy1
+    dx2dy0, dx0dy2 = dx2 * dy0, dx0 * dy2
+    dx0dy1, dx1dy0 = dx0 * dy1, dx1 * dy0
+    lift0, lift1, lift2 = dx0 * dx0 + dy0 * dy0, dx1 * dx1 + dy1 * dy1, dx2 * dx2 + dy2 * dy2
+
+    det = lift0 * (dx1dy2 - dx2dy1) + lift1 * (dx2dy0 - dx0dy2) + lift2 * (dx0dy1 - dx1dy0)
+    permanent = ((abs(dx1dy2) + abs(dx2dy1)) * lift0 + (abs(dx2dy0) + abs(dx0dy2)) * lift1 +
+                 (abs(dx0dy1) + abs(dx1dy0)) * lift2)
+
+    if abs(det) > INCIRCLE_ERROR_BOUND * permanent:
+        return det
+
+    return _exact_in_circle(x0, y0, x1, y1, x2, y2, x3, y3)
 
 # Method that generates a list of <N> random 2D points using uniform distribution
 def generate_random_2D_points(N):
@@ -70,38 +456,52 @@ def generate_random_2D_points(N):
 
 # Method to check if three points are collinear
 def is_collinear(p1, p2, p3):
-    return (p3.y - p1.y) * (p2.x - p1.x) == (p2.y - p1.y) * (p3.x - p1.x)
+    return ccw(p1, p2, p3) == 0
+
+# Smallest prime number not below <n>
+def _next_prime(n):
+    n = max(n, 2)
+
+    while any(n % divisor == 0 for divisor in range(2, int(sqrt(n)) + 1)):
+        n += 1
+
+    return n
+
+# Method to generate <N> random 2D points in general position (no three collinear, no two
+# equal), in O(N) time, as an (N, 2) float64 array of integer coordinates
+#
+# The points are (i, (a i^2 + b i + c) mod p) for N distinct random i in [0, p), with p a prime
+# of about 2N and random a != 0, b, c. Three collinear points would be collinear modulo p too,
+# so three points of the parabola y = a x^2 + b x + c over the integers mod p would lie on a
+# line, which can't happen, since a line crosses it at most twice. The coordinates stay below
+# 2^26, so the orientation predicate is exact in float64 on them
+def generate_general_position_points(N, seed=None):
+    rng = np.random.default_rng(seed)
+    p = _next_prime(2 * N + 3)
 
-# Method to generate a list of <N> non-collinear random 2D points using uniform distribution
+    if p >= 2**26:
+        raise ValueError(f"at most {2**25} points in general position can be generated")
+
+    a = int(rng.integers(1, p))
+    b, c = (int(value) for value in rng.integers(0, p, size=2))
+
+    x = rng.choice(p, size=N, replace=False).astype(np.int64)
+    y = ((a * x % p + b) * x + c) % p
+
+    return np.column_stack((x, y)).astype(np.float64)
+
+# Method to generate a list of <N> non-collinear random 2D points (see
+# generate_general_position_points), scaled by a power of two into [-50, 50]
+# The scaling is exact, so the points stay non-collinear
 def generate_non_collinear_random_2D_points(N):
-    random_2D_points = []
-    min_val, max_val, decimals = -50.0, 50.0, 2
-
-    # Generate the first two points
-    for _ in range(2):
-        x = round(random.uniform(min_val, max_val), decimals)
-        y = round(random.uniform(min_val, max_val), decimals)
-        random_2D_points.append(Point2D(x, y))
-
-    while len(random_2D_points) < N:
-        x = round(random.uniform(min_val, max_val), decimals)
-        y = round(random.uniform(min_val, max_val), decimals)
-        new_point = Point2D(x, y)
-        
-        # Check collinearity with all pairs of existing points
-        is_new_point_collinear = False
-        for i in range(len(random_2D_points) - 1):
-            for j in range(i + 1, len(random_2D_points)):
-                if is_collinear(random_2D_points[i], random_2D_points[j], new_point):
-                    is_new_point_collinear = True
-                    break
-            if is_new_point_collinear:
-                break
-        
-        if not is_new_point_collinear:
-            random_2D_points.append(new_point)
+    coords = generate_general_position_points(N, random.getrandbits(64))
+    p = _next_prime(2 * N + 3)
 
-    return random_2D_points
+    scale = 1.0
+    while (p // 2 + 1) * scale > 50.0:
+        scale /= 2
+
+    return PointSet((coords - p // 2) * scale).to_points()
 
 # Method to check if the second of the three arguments is internal point of the line segment <xz>
 def is_internal_point(x, y, z):
@@ -121,7 +521,7 @@ def right_half_plane(line_point1, line_point2, points):
     for point in points:
         # Compute orientation-predicate to find if the point is right from line (clockwise) 
         if ccw(line_point1, line_point2, point) < 0:
-            right_half_plane.insert(0, point)
+            right_half_plane.append(point)
             
     return right_half_plane
 
@@ -163,6 +563,51 @@ def find_furthest_quadrangle(points):
 
     return leftmost_vertex, lower_vertex, rightmost_vertex, upper_vertex
 
+# Method to get the indices of the extreme points of a point set, given by coordinate arrays,
+# in counter-clockwise order. A 'quadrangle' uses the leftmost, lower, rightmost and upper
+# points, an 'octagon' adds the extreme points in the four diagonal directions
+def find_extreme_polygon(x, y, shape='octagon'):
+    if (shape == 'quadrangle'):
+        vertices = [np.argmin(x), np.argmin(y), np.argmax(x), np.argmax(y)]
+    elif (shape == 'octagon'):
+        x_plus_y = x + y
+        x_minus_y = x - y
+
+        vertices = [np.argmin(x), np.argmin(x_plus_y), np.argmin(y), np.argmax(x_minus_y),
+                    np.argmax(x), np.argmax(x_plus_y), np.argmax(y), np.argmin(x_minus_y)]
+    else:
+        raise ValueError("Unknown extreme polygon shape: " + str(shape))
+
+    # The same point may be extreme in more than one direction
+    polygon = []
+    for vertex in vertices:
+        vertex = int(vertex)
+
+        if not polygon or (x[vertex], y[vertex]) != (x[polygon[-1]], y[polygon[-1]]):
+            polygon.append(vertex)
+
+    if len(polygon) > 1 and (x[polygon[0]], y[polygon[0]]) == (x[polygon[-1]], y[polygon[-1]]):
+        polygon.pop()
+
+    return polygon
+
+# Akl-Toussaint heuristic: every point strictly inside the polygon of the extreme points
+# can't be a convex-hull vertex, so it can be discarded before running a hull algorithm
+# Returns the indices of the points that are kept, in their original order
+def akl_toussaint_filter(x, y, shape='octagon'):
+    polygon = find_extreme_polygon(x, y, shape)
+
+    if len(polygon) < 3:
+        return np.arange(len(x))
+
+    is_interior = np.ones(len(x), dtype=bool)
+
+    for i in range(len(polygon)):
+        A, B = polygon[i], polygon[(i + 1) % len(polygon)]
+        is_interior &= ccw_xy(x[A], y[A], x[B], y[B], x, y) > 0
+
+    return np.flatnonzero(~is_interior)
+
 # Method to plot 2D-Points and their convex hull
 def plot_convex_hull(points, convex_hull_points, title, elapsed_time):
     # Plotting
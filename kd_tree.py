@@ -1,5 +1,8 @@
-from helpers import Point2D, median_point, separate_to_subsets, plot_points,\
-                    is_point_in_rectangle, is_sub_rectangle, is_rectangles_intersection_non_empty
+import numpy as np
+import json
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from helpers import Point2D, PointSet, plot_points
 
 class KDTreeNode:
     def __init__(self, key):
@@ -23,110 +26,1128 @@ class KDTreeNode:
         
         return self.left.to_list() + self.right.to_list()
 
-class KDTree:
-    def __init__(self, points):
-        self.leftmost_x = float('inf')
-        self.rightmost_x = float('-inf')
-        self.lower_y = float('inf')
-        self.upper_y = float('-inf')
-
-        self.root = self.create(None, 0, points)
-
-    def create(self, node, depth, points):
-        if len(points) == 1:
-            node = KDTreeNode(points[0])
-            
-            # Update edge x,y coordinates before returning the node
-            if (points[0].x < self.leftmost_x):
-                self.leftmost_x = points[0].x
-            if (points[0].x > self.rightmost_x):
-                self.rightmost_x = points[0].x
-            if (points[0].y < self.lower_y):
-                self.lower_y = points[0].y
-            if (points[0].y > self.upper_y):
-                self.upper_y = points[0].y
-
-            return node
-        
-        # If depth is even, use a horizontal line to separate the points
-        if depth % 2 == 0:
-            med_point = median_point(points, by='x')
+# Number of points under which a node of a KD-tree is a leaf. Leaves are scanned with one
+# vectorized test of their points, so a larger bucket trades a shallower tree (fewer nodes
+# and fewer Python steps per query) for testing a few points outside of the query
+# (see benchmarks.benchmark_kd_tree_leaf_size)
+KD_TREE_LEAF_SIZE = 128
+
+# Number of rectangles of KDTree.investigate_batch that go down the tree together, which bounds
+# the memory of the pairs (rectangle, node) of a group. The rectangles are sorted by the leaf
+# of their center first, so the points a group reads are close in memory
+KD_TREE_BATCH_GROUP_SIZE = 4096
+
+# Arrays that make up a KDTree, as saved or shared with other processes
+KD_TREE_ARRAYS = ('coords', 'indices', 'lows', 'highs', 'node_points', 'split_dims', 'split_values', 'lefts', 'boxes')
+
+# Arrays of the weights of a KDTree (see KDTree.set_weights), saved with the tree when it has some
+KD_TREE_WEIGHT_ARRAYS = ('weights', 'weight_prefix', 'weight_min', 'weight_max')
+
+# Files of KDTree.save: the magic bytes, the size of the header as 8 bytes (little endian),
+# the header (JSON: the layout of the arrays, the bounds and the leaf size of the tree) and
+# the arrays, from the first multiple of KD_TREE_FILE_ALIGNMENT bytes after the header, each
+# one aligned at KD_TREE_FILE_ALIGNMENT bytes. The offsets of the layout start from there
+KD_TREE_FILE_MAGIC = b'KDTREE01'
+KD_TREE_FILE_ALIGNMENT = 64
+
+# Layout of the <arrays> (name -> array) stored one after the other from byte <start>, each
+# one aligned at <alignment> bytes. Returns the layout, as (name, dtype, shape, offset)
+# entries, and the end of the last array
+def _arrays_layout(arrays, start=0, alignment=8):
+    layout, end = [], start
+
+    for name, array in arrays.items():
+        offset = -(-end // alignment) * alignment
+        layout.append((name, array.dtype.str, array.shape, offset))
+        end = offset + array.nbytes
+
+    return layout, end
+
+# Position in a KDTree file of the first array, after a header of <size> bytes
+def _file_data_start(size):
+    return -(-(len(KD_TREE_FILE_MAGIC) + 8 + size) // KD_TREE_FILE_ALIGNMENT) * KD_TREE_FILE_ALIGNMENT
+
+# Positions of the ranges [<low>, <low> + <sizes>), one after the other
+def _range_positions(low, sizes, index_type):
+    starts = np.cumsum(sizes) - sizes
+    positions = np.arange(int(sizes.sum()), dtype=index_type)
+    positions += np.repeat((low - starts).astype(index_type), sizes)
+
+    return positions
+
+# Stable partition of the entries of <order> at <positions> (all of them when None), which
+# are ranges [low, low + sizes) one after the other, each into its entries marked in
+# <is_left> (there are middle - low of them) followed by the others. Returns the new order
+def _partition_ranges(order, positions, low, middle, sizes, is_left, index_type):
+    moved = order if positions is None else order[positions]
+    starts = np.cumsum(sizes) - sizes
+
+    # With <lefts> the number of marked entries before a position (over all the ranges), the
+    # entry at position p of the range [low, high) goes to low + lefts(p) - lefts(low) if it's
+    # marked, and to middle + (p - low) - (lefts(p) - lefts(low)) otherwise
+    moved_is_left = is_left[moved]
+    lefts = np.cumsum(moved_is_left, dtype=index_type)
+    lefts -= moved_is_left
+    lefts_at_low = lefts[starts]
+
+    destinations = np.repeat((middle - low + lefts_at_low).astype(index_type), sizes)
+    destinations -= lefts
+    destinations += np.arange(len(moved), dtype=index_type) if positions is None else positions
+    lefts += np.repeat((low - lefts_at_low).astype(index_type), sizes)
+    np.copyto(destinations, lefts, where=moved_is_left)
+
+    if positions is None:
+        order = np.empty_like(order)
+    order[destinations] = moved
+
+    return order
 
-            min_subset, max_subset = separate_to_subsets(points, med_point, by='x')
-                    
-        # Else if depth is odd, use a vertical line to separate the points
+# Build the nodes of a KD-tree over the points of the (n, k) array <coords>, level by level
+#
+# The points are sorted once by each coordinate. At every level, each node holds a contiguous
+# range of all k orders, in which its points are sorted by that coordinate. A node splits the
+# coordinate of largest spread over its points (read at the ends of its ranges), at the median
+# position of the order of that coordinate, so the left child gets the first (m + 1) // 2 of
+# its m points, even when some of them share the coordinate of the median. The ranges of the
+# other orders are then partitioned stably in linear time (see _partition_ranges). So every
+# point moves in k - 1 orders per level, in a few vectorized passes, and the build is
+# O(k n log n) with no per-node Python work
+#
+# A node with at most <leaf_size> points is a leaf
+#
+# Returns the order of the points in the tree, where every node holds a contiguous range,
+# and for the nodes in breadth-first order: the range [low, high) of the node, its point (the
+# median of its points), the coordinate it splits and the id of its left child (-1 for a
+# leaf), the right child being the next node
+def _build_kd_tree_nodes(coords, leaf_size=1):
+    n, k = coords.shape
+    index_type = np.int32 if n < 2**31 else np.int64
+
+    # The points are numbered by their first coordinate, so the points of a node have nearby
+    # numbers once it is a few levels deep, and the accesses by point number stay in cache
+    by_first = np.argsort(coords[:, 0]).astype(index_type)
+    ranked = coords[by_first]
+    orders = [np.arange(n, dtype=index_type)] + [np.argsort(ranked[:, d]).astype(index_type) for d in range(1, k)]
+
+    low, high = np.zeros(1, dtype=index_type), np.full(1, n, dtype=index_type)
+    node_lows, node_highs, node_points, node_dims, node_lefts = [], [], [], [], []
+    is_left = np.zeros(n, dtype=bool)
+    level_start = 0
+
+    while len(low):
+        sizes = high - low
+        left_sizes = (sizes + 1) // 2
+
+        if k == 1:
+            dims = np.zeros(len(low), dtype=np.int8)
         else:
-            med_point = median_point(points, by='y')
+            spreads = np.column_stack([ranked[order[high - 1], d] - ranked[order[low], d] for d, order in enumerate(orders)])
+            dims = np.argmax(spreads, axis=1).astype(np.int8)
 
-            min_subset, max_subset = separate_to_subsets(points, med_point, by='y')
+        medians = np.column_stack([order[low + left_sizes - 1] for order in orders])
 
-        node = KDTreeNode(med_point)
-        node.left = self.create(node.left, depth+1, min_subset)
-        node.right = self.create(node.right, depth+1, max_subset)
+        is_internal = sizes > leaf_size
+        internal_count = int(np.count_nonzero(is_internal))
 
-        return node
-    
-    # Methods to find the region defined by left or right subtree of a node
+        # The children of the level come right after it, in the order of their parents
+        level_start += len(low)
+        left_children = np.full(len(low), -1, dtype=index_type)
+        left_children[is_internal] = level_start + 2 * np.arange(internal_count)
+        node_lows.append(low)
+        node_highs.append(high)
+        node_points.append(medians[np.arange(len(low)), dims])
+        node_dims.append(dims)
+        node_lefts.append(left_children)
+
+        if internal_count == 0:
+            break
+
+        if internal_count < len(low):
+            low, high, sizes, left_sizes, dims = (low[is_internal], high[is_internal], sizes[is_internal],
+                                                  left_sizes[is_internal], dims[is_internal])
+
+        middle = low + left_sizes
+
+        # The internal nodes by split coordinate, with the positions of their ranges (None for
+        # all the positions, when every point is in such a node, as at the levels without leaves)
+        groups = [np.flatnonzero(dims == d) for d in range(k)]
+        is_whole = int(sizes.sum()) == n
+        positions = [None if is_whole and len(group) == len(low) else _range_positions(low[group], sizes[group], index_type)
+                     for group in groups]
+
+        # Mark the points of the left children, the first left_size points of a range of the
+        # order of its split coordinate
+        for d, group in enumerate(groups):
+            if len(group):
+                halves = np.column_stack((left_sizes[group], sizes[group] - left_sizes[group])).ravel()
+                marked = orders[d] if positions[d] is None else orders[d][positions[d]]
+                is_left[marked] = np.repeat(np.tile([True, False], len(group)), halves)
+
+        # Partition each order in the nodes that split another coordinate
+        for d in range(k):
+            others = [e for e in range(k) if e != d and len(groups[e])]
+
+            if not others:
+                continue
+
+            if len(others) == 1:
+                group, others_positions = groups[others[0]], positions[others[0]]
+            else:
+                group = np.concatenate([groups[e] for e in others])
+                others_positions = np.concatenate([positions[e] for e in others])
+
+            orders[d] = _partition_ranges(orders[d], others_positions, low[group], middle[group], sizes[group], is_left, index_type)
+
+        low = np.column_stack((low, middle)).ravel()
+        high = np.column_stack((middle, high)).ravel()
+
+    # All the orders have the same points in every range, so any one is the tree order
+    return (by_first[orders[0]], np.concatenate(node_lows), np.concatenate(node_highs),
+            by_first[np.concatenate(node_points)], np.concatenate(node_dims), np.concatenate(node_lefts))
+
+# Node of a KDTree, read from the arrays of the tree when its fields are accessed, so a
+# tree doesn't keep an object per node. It has the same fields and methods as KDTreeNode
+class KDTreeNodeView(KDTreeNode):
+    __slots__ = ('tree', 'id')
+
+    def __init__(self, tree, id):
+        self.tree = tree
+        self.id = id
+
+    @property
+    def left(self):
+        left = self.tree.lefts[self.id]
+        return None if left == -1 else KDTreeNodeView(self.tree, left)
+
+    @property
+    def right(self):
+        left = self.tree.lefts[self.id]
+        return None if left == -1 else KDTreeNodeView(self.tree, left + 1)
+
+    @property
+    def point(self):
+        return self.tree.point(self.tree.node_points[self.id])
+
+    # The points of the node are a range of the tree order, no recursion needed
+    def to_list(self):
+        tree = self.tree
+        return [tree.point(i) for i in tree.indices[tree.lows[self.id]:tree.highs[self.id]].tolist()]
+
+# Coordinates of a query point, given as a Point2D or as a sequence of numbers, as a tuple
+def _query_coordinates(point):
+    if isinstance(point, Point2D):
+        return point.x, point.y
+
+    return tuple(map(float, point))
+
+# Coordinates of the input points of a tree (a list of Point2D objects, a PointSet or an
+# (n, k) array) as an (n, k) float array
+def _input_coordinates(points, name):
+    if isinstance(points, PointSet):
+        return points.coords
+
+    if isinstance(points, np.ndarray):
+        coords = np.ascontiguousarray(points, dtype=np.float64)
+
+        if coords.ndim != 2 or coords.shape[1] == 0:
+            raise ValueError(f"{name} expects an (n, k) array of coordinates")
+
+        return coords
+
+    return PointSet.from_points(points).coords
+
+# Rectangle queries of investigate_batch in a worker process, for a tree loaded from the file
+# <path>: the worker maps the same file, so all the processes read one page-cached copy
+def _investigate_batch_file_chunk(path, regions, query_ids):
+    return KDTree.load(path)._investigate_batch_positions(regions, query_ids)
+
+# Rectangle queries of investigate_batch in a worker process. The arrays of the tree are read
+# from the shared memory block <memory_name>, laid out as given by <layout> (see
+# KDTree._share), so only the names, the layout and the results are pickled
+def _investigate_batch_chunk(memory_name, layout, bounds, regions, query_ids):
+    memory = shared_memory.SharedMemory(name=memory_name)
+
+    try:
+        arrays = {name: np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+                  for name, dtype, shape, offset in layout}
+        tree = KDTree._from_arrays(arrays, bounds)
+
+        return tree._investigate_batch_positions(regions, query_ids)
+    finally:
+        arrays = tree = None
+        memory.close()
+
+# KD-tree stored in flat arrays, over points of any number k of coordinates. The points are
+# kept in the tree order (<coords>, with their indices in the input in <indices>), in which
+# every node holds the contiguous range [lows[node], highs[node]). Node 0 is the root and the
+# nodes are numbered breadth-first, with the children of node i at lefts[i] and lefts[i] + 1
+# (lefts[i] is -1 for a leaf). An internal node splits the coordinate split_dims[i] (the one
+# its points spread the most along) at split_values[i], the coordinate of its median point
+# node_points[i]: its left child holds the points up to the split value and its right child
+# the points from it. A leaf holds up to leaf_size points
+#
+# Regions (boxes) are given as [low_0, high_0, low_1, high_1, ...], the range of each
+# coordinate in turn, so a 2D region is the rectangle [left, right, lower, upper]
+#
+# Every node also stores the tight bounding box of its points, boxes[i], computed once at
+# build time. The queries prune with these boxes, which are usually much smaller than the
+# regions cut by the split values (they never reach into the empty space around clustered
+# points), and read them in place, without building a region per visited node
+class KDTree:
+    # <points> is a list of Point2D objects, a PointSet or an (n, k) array of coordinates, each
+    # leaf holds up to <leaf_size> of them
+    # <weights> optionally gives a number per point, for the aggregates of range_aggregate
+    def __init__(self, points, leaf_size=KD_TREE_LEAF_SIZE, weights=None):
+        self.leaf_size = leaf_size
+        self.path = None
+
+        self.root = self.create(points)
+        self.set_weights(weights)
+
+    def create(self, points):
+        self.points = points
+        coords = _input_coordinates(points, 'KDTree')
+        dimensions = coords.shape[1]
+
+        if len(coords) == 0:
+            self.bounds = [float('inf'), float('-inf')] * dimensions
+            self.coords = np.empty((0, dimensions))
+            self.indices, self.lows, self.highs, self.node_points, self.lefts = (np.empty(0, dtype=np.intp) for _ in range(5))
+            self.split_dims, self.split_values = np.empty(0, dtype=np.int8), np.empty(0)
+            self.boxes = np.empty((0, 2 * dimensions))
+            return None
+
+        # Edge coordinates of the points, [low_0, high_0, low_1, high_1, ...]
+        self.bounds = np.column_stack((coords.min(axis=0), coords.max(axis=0))).ravel().tolist()
+
+        self.indices, self.lows, self.highs, self.node_points, self.split_dims, self.lefts = _build_kd_tree_nodes(coords, self.leaf_size)
+        self.coords = coords[self.indices]
+        self.split_values = coords[self.node_points, self.split_dims]
+
+        self.boxes = np.column_stack([self._bottom_up(self.coords[:, d], reduce) for d in range(dimensions)
+                                      for reduce in (np.minimum, np.maximum)])
+
+        return KDTreeNodeView(self, 0)
+
+    # Number of coordinates of the points
+    @property
+    def dimensions(self):
+        return self.coords.shape[1]
+
+    # Edges of the bounding box of the points, in 2D
+    @property
+    def leftmost_x(self):
+        return self.bounds[0]
+
+    @property
+    def rightmost_x(self):
+        return self.bounds[1]
+
+    @property
+    def lower_y(self):
+        return self.bounds[2]
+
+    @property
+    def upper_y(self):
+        return self.bounds[3]
+
+    # Node ids by level, from the root down
+    def _levels(self):
+        levels = [np.zeros(1, dtype=np.intp)]
+
+        while True:
+            lefts = self.lefts[levels[-1]]
+            lefts = lefts[lefts != -1]
+
+            if len(lefts) == 0:
+                return levels
+
+            levels.append(np.column_stack((lefts, lefts + 1)).ravel())
+
+    # Reduction with the ufunc <reduce> (like np.minimum) of the <values> of the points (in tree
+    # order) of every node. The leaves split the tree order in consecutive ranges, which
+    # reduceat reduces at once, and each level above combines the results of its children
+    def _bottom_up(self, values, reduce):
+        result = np.empty(len(self.lows), dtype=values.dtype)
+
+        if len(result) == 0:
+            return result
+
+        is_leaf = self.lefts == -1
+        leaves = np.flatnonzero(is_leaf)
+        leaves = leaves[np.argsort(self.lows[leaves])]
+        result[leaves] = reduce.reduceat(values, self.lows[leaves])
+
+        for level in reversed(self._levels()):
+            level = level[~is_leaf[level]]
+            lefts = self.lefts[level]
+            result[level] = reduce(result[lefts], result[lefts + 1])
+
+        return result
+
+    # Store the <weights> of the points (one number per input point, or None to drop them)
+    # and their aggregates: the prefix sums of the weights in tree order, so the sum of a node
+    # is the difference of two of them, and the minimum and maximum of each node
+    def set_weights(self, weights):
+        self.weights = None
+
+        if weights is None:
+            return
+
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (len(self),):
+            raise ValueError("KDTree expects one weight per point")
+
+        self.weights = weights[self.indices]
+        self.weight_prefix = np.concatenate(([0.0], np.cumsum(self.weights)))
+        self.weight_min = self._bottom_up(self.weights, np.minimum)
+        self.weight_max = self._bottom_up(self.weights, np.maximum)
+
+    # Tree made of the given <arrays> (the KD_TREE_ARRAYS, by name) and bounding box <bounds>
+    # (as self.bounds), without building anything. Such a tree has no input points, so its
+    # queries are answered with indices only
+    @classmethod
+    def _from_arrays(cls, arrays, bounds, weights=None):
+        tree = cls.__new__(cls)
+        tree.bounds = list(bounds)
+        tree.points = None
+        tree.leaf_size = None
+        tree.path = None
+        tree.tree_positions = None
+
+        for name in KD_TREE_ARRAYS:
+            setattr(tree, name, arrays[name])
+
+        tree.root = KDTreeNodeView(tree, 0) if len(tree.indices) else None
+        tree.set_weights(weights)
+
+        return tree
+
+    # Save the tree in the file <path>: its arrays (with the points in the tree order and the
+    # weights, if any) as they are in memory, so KDTree.load maps them back without any work
+    def save(self, path):
+        arrays = {name: getattr(self, name) for name in KD_TREE_ARRAYS}
+
+        if self.weights is not None:
+            arrays.update((name, getattr(self, name)) for name in KD_TREE_WEIGHT_ARRAYS)
+
+        layout, _ = _arrays_layout(arrays, 0, KD_TREE_FILE_ALIGNMENT)
+        header = json.dumps({'bounds': self.bounds,
+                             'leaf_size': self.leaf_size, 'layout': layout}).encode()
+        start = _file_data_start(len(header))
+
+        with open(path, 'wb') as file:
+            file.write(KD_TREE_FILE_MAGIC)
+            file.write(len(header).to_bytes(8, 'little'))
+            file.write(header)
+
+            for name, dtype, shape, offset in layout:
+                file.write(bytes(start + offset - file.tell()))
+                file.write(np.ascontiguousarray(arrays[name]).data)
+
+    # Tree saved in the file <path> by KDTree.save. The arrays are memory-mapped (read-only),
+    # not read: loading takes the same time for any size of tree, the pages are read when the
+    # queries touch them, and the processes that load the same file share them in the page
+    # cache. A loaded tree has no input points: the queries return the saved points (as Point2D
+    # in 2D, as tuples otherwise)
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            if file.read(len(KD_TREE_FILE_MAGIC)) != KD_TREE_FILE_MAGIC:
+                raise ValueError(f"'{path}' is not a KDTree file")
+
+            size = int.from_bytes(file.read(8), 'little')
+            header = json.loads(file.read(size))
+
+        start = _file_data_start(size)
+        memory = np.memmap(path, dtype=np.uint8, mode='r')
+        arrays = {name: np.ndarray(tuple(shape), dtype=dtype, buffer=memory, offset=start + offset)
+                  for name, dtype, shape, offset in header['layout']}
+
+        tree = cls._from_arrays(arrays, header['bounds'])
+        tree.leaf_size = header['leaf_size']
+        tree.path = path
+
+        if 'weights' in arrays:
+            for name in KD_TREE_WEIGHT_ARRAYS:
+                setattr(tree, name, arrays[name])
+
+        return tree
+
+    # The input point at index <i>. A tree without its input points (loaded from a file) finds
+    # the point in the tree order, by the inverse of the order of the indices, and gives it as
+    # a Point2D in 2D and as a tuple of coordinates otherwise
+    def point(self, i):
+        if self.points is not None:
+            return self.points[i]
+
+        if self.tree_positions is None:
+            self.tree_positions = np.empty_like(self.indices)
+            self.tree_positions[self.indices] = np.arange(len(self.indices), dtype=self.indices.dtype)
+
+        coordinates = self.coords[self.tree_positions[i]].tolist()
+        return Point2D(*coordinates) if len(coordinates) == 2 else tuple(coordinates)
+
+    def __len__(self):
+        return len(self.indices)
+
+    # Methods to find the region defined by left or right subtree of a node, cut from the
+    # region <prev_region> of the node at its split value
     def find_region(self, node=None, prev_region=None, which_child=None, depth=0):
         if (depth == 0):
-            return [self.leftmost_x, self.rightmost_x, self.lower_y, self.upper_y]
-        
-        leftmost, rightmost, lower, upper = prev_region
-        
+            return list(self.bounds)
+
+        region = list(prev_region)
+        split_dim = self.split_dims.item(node.id)
+
         if (which_child == 'left'):
-            if (depth % 2 == 1):
-                return [leftmost, node.point.x, lower, upper]
-            
-            else:
-                return [leftmost, rightmost, lower, node.point.y]
-            
+            region[2 * split_dim + 1] = self.split_values.item(node.id)
+
         elif (which_child == 'right'):
-            if (depth % 2 == 1):
-                return [node.point.x, rightmost, lower, upper]
-            
+            region[2 * split_dim] = self.split_values.item(node.id)
+
+        return region
+
+    # Find the points of <target_region> under the nodes <candidates>. The ids of the nodes
+    # whose box is inside the target region are added to <nodes>, and the positions (in tree
+    # order) of the points of the leaves that are partly in it to <positions>. The children of
+    # a node are tested in the loop, so the (many) disjoint ones cost no call
+    def _investigate(self, candidates, target_region, nodes, positions):
+        width = len(target_region)
+        boxes = self.boxes
+
+        for node in candidates:
+            box = boxes[node].tolist()
+            is_inside = True
+
+            for j in range(0, width, 2):
+                low, high = box[j], box[j + 1]
+
+                if (high < target_region[j] or low > target_region[j + 1]):
+                    break
+
+                if (low < target_region[j] or high > target_region[j + 1]):
+                    is_inside = False
             else:
-                return [leftmost, rightmost, node.point.y, upper]
-            
-    def _investigate(self, node, target_region, prev_node_region, depth=0):
-        # Base case : if node is leaf then return it if it's point is in the region
-        if (node.left == None and node.right == None):
-            if (is_point_in_rectangle(node.point, target_region)):
-                return [node]
-        
-        else:
-            # Check if left child region (lc(v)) is in the given region, else investigate left child node
-            result = []
+                if (is_inside):
+                    nodes.append(node)
+                    continue
 
-            left_child_region = self.find_region(node, prev_node_region, 'left', depth+1)
+                # (item gives the entries of the arrays as Python numbers, which is faster to index)
+                left = self.lefts.item(node)
 
-            if (is_sub_rectangle(left_child_region, target_region)):
-                result += [node.left]
+                # Base case : if node is leaf then test all of its points at once
+                if (left == -1):
+                    low, high = self.lows.item(node), self.highs.item(node)
+                    is_point_inside = (self.coords[low:high, 0] >= target_region[0]) & (self.coords[low:high, 0] <= target_region[1])
 
-            elif (is_rectangles_intersection_non_empty(left_child_region, target_region)):
-                left_child_result = self._investigate(node.left, target_region, left_child_region, depth+1)
+                    for j in range(2, width, 2):
+                        coordinates = self.coords[low:high, j // 2]
+                        is_point_inside &= (coordinates >= target_region[j]) & (coordinates <= target_region[j + 1])
 
-                result += [] if left_child_result == None else left_child_result
+                    inside = np.flatnonzero(is_point_inside)
 
-            right_child_region = self.find_region(node, prev_node_region, 'right', depth+1)
+                    if (len(inside)):
+                        positions.append(inside + low)
 
-            # Same for right child region (rc(v))
-            if (is_sub_rectangle(right_child_region, target_region)):
-                result += [node.right]
+                    continue
 
-            elif (is_rectangles_intersection_non_empty(right_child_region, target_region)):
-                right_child_result = self._investigate(node.right, target_region, right_child_region, depth+1)
+                self._investigate((left, left + 1), target_region, nodes, positions)
 
-                result += [] if right_child_result == None else right_child_result                    
-        
-            return result
-    
+    # <region> as a list of 2k floats, ValueError if it has another size
+    def _region(self, region):
+        region = [float(value) for value in region]
+
+        if len(region) != 2 * self.dimensions:
+            raise ValueError(f"KDTree expects regions of {2 * self.dimensions} values (a range per coordinate)")
+
+        return region
+
+    # Nodes whose points are the points of <region>, [left, right, lower, upper] in 2D: a
+    # KDTreeNodeView for each node inside the region, and a single-point KDTreeNode for each
+    # point of the region in a leaf that is only partly inside it
     def investigate(self, region):
-        return self._investigate(self.root, region, self.find_region())
+        if self.root is None:
+            return []
+
+        nodes, positions = [], []
+        self._investigate((0,), self._region(region), nodes, positions)
+
+        return ([KDTreeNodeView(self, node) for node in nodes] +
+                [KDTreeNode(self.point(i)) for part in positions for i in self.indices[part].tolist()])
+
+    # Same query, as the indices of the points of <region> in the input (in tree order)
+    def investigate_indices(self, region):
+        if self.root is None:
+            return np.empty(0, dtype=np.intp)
+
+        nodes, positions = [], []
+        self._investigate((0,), self._region(region), nodes, positions)
+
+        return np.concatenate([self.indices[self.lows[node]:self.highs[node]] for node in nodes] +
+                              [self.indices[part] for part in positions] + [self.indices[:0]])
+
+    # Number of points in <region>. The nodes inside the region
+    # are counted from their ranges, so only the points of the leaves crossing its boundary
+    # are looked at, whatever the number of points in it
+    def range_count(self, region):
+        return self.range_aggregate(region, 'count')
+
+    # Aggregate of the weights of the points in <region>: 'count' (which needs no weights),
+    # 'sum', 'min' or 'max'. From the stored aggregates of the nodes inside the region and the
+    # points of the leaves crossing its boundary. An empty region gives 0, 0, inf and -inf
+    def range_aggregate(self, region, aggregate='sum'):
+        if aggregate not in ('count', 'sum', 'min', 'max'):
+            raise ValueError(f"unknown aggregate '{aggregate}', expected 'count', 'sum', 'min' or 'max'")
+
+        if aggregate != 'count' and self.weights is None:
+            raise ValueError("KDTree has no weights, give them to the constructor or to set_weights")
+
+        nodes, positions = [], []
+        if self.root is not None:
+            self._investigate((0,), self._region(region), nodes, positions)
+
+        nodes = np.array(nodes, dtype=np.intp)
+        positions = np.concatenate(positions + [np.empty(0, dtype=np.intp)])
+
+        if aggregate == 'count':
+            return int((self.highs[nodes] - self.lows[nodes]).sum()) + len(positions)
+
+        if aggregate == 'sum':
+            return float((self.weight_prefix[self.highs[nodes]] - self.weight_prefix[self.lows[nodes]]).sum() +
+                         self.weights[positions].sum())
+
+        if aggregate == 'min':
+            return float(min(self.weight_min[nodes].min(initial=np.inf), self.weights[positions].min(initial=np.inf)))
+
+        return float(max(self.weight_max[nodes].max(initial=-np.inf), self.weights[positions].max(initial=-np.inf)))
+
+    # Leaf of each of the (M, k) <points>: the leaf whose region holds it (with a point on a
+    # split line going right), found for all of them at once, one level at a time
+    def _locate_leaves(self, points):
+        nodes = np.zeros(len(points), dtype=np.intp)
+        active = np.arange(len(points))
+
+        while len(active):
+            lefts = self.lefts[nodes[active]]
+            is_internal = lefts != -1
+            active, lefts = active[is_internal], lefts[is_internal]
+
+            split_dims = self.split_dims[nodes[active]]
+            goes_right = points[active, split_dims] > self.split_values[nodes[active]]
+            nodes[active] = lefts + goes_right
+
+        return nodes
+
+    # Points of the boxes <regions> (rows of an (M, 2k) array) with ids <query_ids>, as
+    # pairs (ids, positions in tree order). The rectangles go down the tree together, one level
+    # at a time, as pairs (rectangle, node) whose box intersects the rectangle: a pair whose
+    # rectangle contains the box of the node gives the whole range of the node, a pair on an
+    # internal node is replaced by the pairs of its children, and the points of a pair on a leaf
+    # are tested all at once. So every step is vectorized over the whole group
+    def _investigate_group(self, regions, query_ids):
+        pair_queries = query_ids
+        pair_nodes = np.zeros(len(query_ids), dtype=np.intp)
+
+        range_queries, range_nodes = [], []
+        leaf_queries, leaf_nodes = [], []
+
+        while len(pair_queries):
+            targets = regions[pair_queries]
+            pair_regions = self.boxes[pair_nodes]
+
+            is_intersecting = np.all((targets[:, 0::2] <= pair_regions[:, 1::2]) & (targets[:, 1::2] >= pair_regions[:, 0::2]), axis=1)
+            is_containing = np.all((targets[:, 0::2] <= pair_regions[:, 0::2]) & (targets[:, 1::2] >= pair_regions[:, 1::2]), axis=1)
+
+            range_queries.append(pair_queries[is_containing])
+            range_nodes.append(pair_nodes[is_containing])
+
+            is_partial = is_intersecting & ~is_containing
+            pair_queries, pair_nodes = pair_queries[is_partial], pair_nodes[is_partial]
+
+            lefts = self.lefts[pair_nodes]
+            is_leaf = lefts == -1
+            leaf_queries.append(pair_queries[is_leaf])
+            leaf_nodes.append(pair_nodes[is_leaf])
+
+            # Each internal pair becomes the pairs of the two children
+            pair_queries, lefts = pair_queries[~is_leaf], lefts[~is_leaf]
+            pair_queries = np.concatenate((pair_queries, pair_queries))
+            pair_nodes = np.concatenate((lefts, lefts + 1))
+
+        range_queries, range_nodes = np.concatenate(range_queries), np.concatenate(range_nodes)
+        leaf_queries, leaf_nodes = np.concatenate(leaf_queries), np.concatenate(leaf_nodes)
+
+        # Every position of the ranges, with its query
+        range_ids, range_positions = self._expand_ranges(range_queries, range_nodes)
+
+        # Every position of the leaves, kept when its point is in the rectangle of its query
+        leaf_ids, leaf_positions = self._expand_ranges(leaf_queries, leaf_nodes)
+        targets = regions[leaf_ids]
+        coords = self.coords[leaf_positions]
+        is_inside = np.all((coords >= targets[:, 0::2]) & (coords <= targets[:, 1::2]), axis=1)
+
+        return np.concatenate((range_ids, leaf_ids[is_inside])), np.concatenate((range_positions, leaf_positions[is_inside]))
+
+    # The positions of the ranges of <nodes>, each with the matching entry of <queries>
+    def _expand_ranges(self, queries, nodes):
+        lows, sizes = self.lows[nodes], self.highs[nodes] - self.lows[nodes]
+        starts = np.cumsum(sizes) - sizes
+
+        positions = np.arange(int(sizes.sum()), dtype=np.intp)
+        positions += np.repeat(lows - starts, sizes)
+
+        return np.repeat(queries, sizes), positions
+
+    # Pairs (query ids, positions in tree order) of the points of the <regions> with ids
+    # <query_ids>, one group of rectangles at a time
+    def _investigate_batch_positions(self, regions, query_ids):
+        found = [self._investigate_group(regions, query_ids[start:start + KD_TREE_BATCH_GROUP_SIZE])
+                 for start in range(0, len(query_ids), KD_TREE_BATCH_GROUP_SIZE)]
+
+        return np.concatenate([ids for ids, _ in found]), np.concatenate([positions for _, positions in found])
+
+    # Copy the arrays of the tree to a new shared memory block, one after the other (8-byte
+    # aligned). Returns the block and its layout, as (name, dtype, shape, offset) entries
+    def _share(self):
+        layout, size = _arrays_layout({name: getattr(self, name) for name in KD_TREE_ARRAYS})
+
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+        for name, dtype, shape, offset in layout:
+            np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)[...] = getattr(self, name)
+
+        return memory, layout
+
+    # _investigate_batch_positions with the groups of rectangles split among <workers> processes.
+    # A tree loaded from a file is mapped again by the workers, any other is copied to shared memory
+    def _investigate_batch_parallel(self, regions, query_ids, workers):
+        memory = None
+        if self.path is None:
+            memory, layout = self._share()
+            bounds = self.bounds
+
+        # Whole groups per worker, so the groups are the same as in a single process
+        groups = -(-len(query_ids) // KD_TREE_BATCH_GROUP_SIZE)
+        chunk = -(-groups // workers) * KD_TREE_BATCH_GROUP_SIZE
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                if memory is None:
+                    futures = [executor.submit(_investigate_batch_file_chunk, self.path, regions, query_ids[start:start + chunk])
+                               for start in range(0, len(query_ids), chunk)]
+                else:
+                    futures = [executor.submit(_investigate_batch_chunk, memory.name, layout, bounds, regions,
+                                               query_ids[start:start + chunk])
+                               for start in range(0, len(query_ids), chunk)]
+                results = [future.result() for future in futures]
+        finally:
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+
+        return np.concatenate([ids for ids, _ in results]), np.concatenate([positions for _, positions in results])
+
+    # Same as investigate_indices for each row of an (M, 2k) array of <regions> (an (M, 4)
+    # array of rectangles in 2D). Returns (indices, offsets): the points of region i are
+    # indices[offsets[i]:offsets[i + 1]]. With <workers> set, the groups of rectangles are split
+    # among that many processes, which read the tree from shared memory
+    def investigate_batch(self, regions, workers=None):
+        regions = np.asarray(regions, dtype=np.float64).reshape(-1, 2 * self.dimensions)
+        offsets = np.zeros(len(regions) + 1, dtype=np.intp)
+
+        if self.root is None or len(regions) == 0:
+            return np.empty(0, dtype=np.intp), offsets
+
+        # Sort the boxes by the tree order of the leaf of their center
+        centers = (regions[:, 0::2] + regions[:, 1::2]) / 2
+        query_ids = np.argsort(self.lows[self._locate_leaves(centers)], kind='stable')
+
+        if workers is None or workers <= 1:
+            ids, positions = self._investigate_batch_positions(regions, query_ids)
+        else:
+            ids, positions = self._investigate_batch_parallel(regions, query_ids, workers)
+
+        order = np.argsort(ids, kind='stable')
+        np.cumsum(np.bincount(ids, minlength=len(regions)), out=offsets[1:])
+
+        return self.indices[positions[order]], offsets
+
+    # Squared distance from <point> to the closest and to the furthest point of the box of <node>
+    def _box_distances2(self, node, point):
+        box = self.boxes[node].tolist()
+        near = far = 0.0
+
+        for j, coordinate in enumerate(point):
+            low, high = box[2 * j], box[2 * j + 1]
+            distance = max(low - coordinate, 0.0, coordinate - high)
+            far_distance = max(coordinate - low, high - coordinate)
+            near += distance * distance
+            far += far_distance * far_distance
+
+        return near, far
+
+    # Squared distances from <point> to the points at the positions [<low>, <high>) of the tree order
+    def _distances2(self, low, high, point):
+        differences = self.coords[low:high] - point
+        return np.einsum('ij,ij->i', differences, differences)
+
+    # <point> (a Point2D or a sequence of k numbers) as a tuple, ValueError if it has another size
+    def _query_point(self, point):
+        point = _query_coordinates(point)
+
+        if len(point) != self.dimensions:
+            raise ValueError(f"KDTree expects query points with {self.dimensions} coordinates")
+
+        return point
+
+    # Branch and bound search of the <k> nearest points to <point> under <node>. <best> holds
+    # the squared distances and the positions (in tree order) of the nearest points found so
+    # far and the k-th distance, and a subtree is skipped when its box is further than that.
+    # The closer child is searched first, so the bound gets tight early
+    def _knn(self, node, point, k, best):
+        left = self.lefts.item(node)
+
+        if (left == -1):
+            low, high = self.lows.item(node), self.highs.item(node)
+
+            distances = np.concatenate((best[0], self._distances2(low, high, point)))
+            positions = np.concatenate((best[1], np.arange(low, high)))
+
+            if (len(distances) > k):
+                nearest = np.argpartition(distances, k - 1)[:k]
+                distances, positions = distances[nearest], positions[nearest]
+
+            best[0], best[1] = distances, positions
+            best[2] = distances.max() if len(distances) == k else float('inf')
+            return
+
+        children = sorted((self._box_distances2(child, point)[0], child) for child in (left, left + 1))
+
+        for distance, child in children:
+            if (distance <= best[2]):
+                self._knn(child, point, k, best)
+
+    # Indices (in the input) of the <k> points nearest to <point> (a Point2D or a sequence of k
+    # numbers, like an (x, y) pair), from the nearest one. Fewer when the tree has fewer points
+    def knn(self, point, k):
+        point = self._query_point(point)
+
+        if self.root is None or k <= 0:
+            return np.empty(0, dtype=np.intp)
+
+        best = [np.empty(0), np.empty(0, dtype=np.intp), float('inf')]
+        self._knn(0, point, k, best)
+
+        distances, positions = best[0], best[1]
+        order = np.lexsort((positions, distances))
+
+        return self.indices[positions[order]]
+
+    # Search of the points at distance at most sqrt(<radius2>) of <point> under <node>. The
+    # nodes whose box is inside the ball are added to <nodes> and the positions (in tree
+    # order) of the points of the other leaves to <positions>
+    def _radius(self, node, point, radius2, nodes, positions):
+        near, far = self._box_distances2(node, point)
+
+        if (near > radius2):
+            return
+
+        if (far <= radius2):
+            nodes.append(node)
+            return
+
+        left = self.lefts.item(node)
+
+        if (left == -1):
+            low, high = self.lows.item(node), self.highs.item(node)
+            inside = np.flatnonzero(self._distances2(low, high, point) <= radius2)
+
+            if (len(inside)):
+                positions.append(inside + low)
+            return
+
+        self._radius(left, point, radius2, nodes, positions)
+        self._radius(left + 1, point, radius2, nodes, positions)
+
+    # Indices (in the input) of the points at distance at most <radius> of <point> (a Point2D
+    # or a sequence of k numbers), in tree order
+    def radius(self, point, radius):
+        point = self._query_point(point)
+
+        if self.root is None or radius < 0:
+            return np.empty(0, dtype=np.intp)
+
+        nodes, positions = [], []
+        self._radius(0, point, radius * radius, nodes, positions)
+
+        return np.concatenate([self.indices[self.lows[node]:self.highs[node]] for node in nodes] +
+                              [self.indices[part] for part in positions] + [self.indices[:0]])
+
+    # knn for each row of an (M, k) array of <queries>, as an (M, min(k, n)) array of indices
+    # The queries are answered in the order of their first coordinate, so consecutive ones
+    # visit the same leaves (warm in cache)
+    def knn_batch(self, queries, k):
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, self.dimensions)
+        result = np.empty((len(queries), max(0, min(k, len(self)))), dtype=np.intp)
+
+        for i in np.argsort(queries[:, 0], kind='stable').tolist():
+            result[i] = self.knn(queries[i].tolist(), k)
+
+        return result
+
+    # radius for each row of an (M, k) array of <queries>, with the same <radius> or one per
+    # query. Returns (indices, offsets): the points of query i are indices[offsets[i]:offsets[i + 1]]
+    def radius_batch(self, queries, radius):
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, self.dimensions)
+        radii = np.broadcast_to(np.asarray(radius, dtype=np.float64), len(queries)).tolist()
+
+        results = [self.radius(query, query_radius) for query, query_radius in zip(queries.tolist(), radii)]
+        offsets = np.zeros(len(queries) + 1, dtype=np.intp)
+        np.cumsum([len(result) for result in results], out=offsets[1:])
+
+        return np.concatenate(results + [np.empty(0, dtype=np.intp)]), offsets
 
     def print(self):
         if self is not None:
             self.root.print()
 
+# Size of the buffer of DynamicKDTree: the last inserted points are kept in an array that is
+# scanned by every query, and go to a tree when it is full
+DYNAMIC_KD_TREE_BUFFER_SIZE = KD_TREE_LEAF_SIZE
+
+# Share of deleted points at which a tree of DynamicKDTree is rebuilt with its live points only
+DYNAMIC_KD_TREE_MAX_DELETED = 0.5
+
+# KD-tree under insertions and deletions of points, with the logarithmic method of Bentley and
+# Saxe: the points are spread over static KDTrees of sizes about buffer_size * 2^i (at most
+# one per size) and a small buffer. A full buffer is merged with the trees of sizes 1, 2, ...,
+# 2^(j-1) times its size (all present) into one new tree of size 2^j, like a binary counter
+# that adds one. A point goes through O(log n) rebuilds, each vectorized (see
+# _build_kd_tree_nodes), so an insertion is O(log^2 n) amortized. A deletion only marks the
+# point, and a tree is rebuilt without its deleted points once they are more than
+# DYNAMIC_KD_TREE_MAX_DELETED of it. A query asks every tree and the buffer, O(log n) of them
+#
+# Every inserted point gets an id, its insertion number, which the queries return. Equal
+# points may be inserted several times. The bounding box (bounds, as for KDTree) always holds
+# the live points, it is the box of the points stored, deleted or not, until their tree is
+# rebuilt. The points have as many coordinates as the initial ones (2 when there are none, an
+# empty (0, k) array starts a tree of k coordinates), and so do the queries and the insertions
+class DynamicKDTree:
+    # <points> is a list of Point2D objects, a PointSet or an (n, k) array, as for KDTree
+    def __init__(self, points=(), leaf_size=KD_TREE_LEAF_SIZE):
+        self.leaf_size = leaf_size
+        coords = _input_coordinates(points, 'DynamicKDTree')
+        self.bounds = [float('inf'), float('-inf')] * coords.shape[1]
+
+        # Storage by id: the coordinates, the Point2D object (None for other inputs), whether
+        # the point is live, and its tree (its slot in <_trees>, -1 in the buffer)
+        self._coords = np.empty((0, coords.shape[1]))
+        self._objects = []
+        self._is_live = np.empty(0, dtype=bool)
+        self._tree_of = np.empty(0, dtype=np.intp)
+        self._size = 0
+        self._count = 0
+
+        # Ids of the live copies of each point, by its tuple of coordinates
+        self._ids = {}
+
+        # Slot i holds None or (tree, ids of its points, number of them deleted)
+        self._trees = []
+        self._buffer = []
+
+        is_objects = not isinstance(points, (PointSet, np.ndarray))
+        ids = self._store(coords, list(points) if is_objects else [None] * len(coords))
+
+        if len(ids):
+            # The initial points go to the tree of the smallest slot large enough
+            slot = max(0, int(np.ceil(np.log2(max(1, len(ids) / DYNAMIC_KD_TREE_BUFFER_SIZE)))))
+            self._trees = [None] * (slot + 1)
+            self._build(slot, ids)
+
+    # Number of coordinates of the points
+    @property
+    def dimensions(self):
+        return self._coords.shape[1]
+
+    # Same bounding box edges in 2D and same checks of the regions and the query points as KDTree
+    leftmost_x, rightmost_x, lower_y, upper_y = KDTree.leftmost_x, KDTree.rightmost_x, KDTree.lower_y, KDTree.upper_y
+    _region = KDTree._region
+    _query_point = KDTree._query_point
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, point):
+        return _query_coordinates(point) in self._ids
+
+    # The point with id <i>: the inserted object for an inserted Point2D, otherwise a Point2D
+    # in 2D and a tuple of coordinates in other dimensions
+    def point(self, i):
+        if self._objects[i] is not None:
+            return self._objects[i]
+
+        coordinates = self._coords[i].tolist()
+        return Point2D(*coordinates) if len(coordinates) == 2 else tuple(coordinates)
+
+    # Add the points of the (m, k) array <coords> to the storage, as the next ids, and return them
+    def _store(self, coords, objects):
+        ids = np.arange(self._count, self._count + len(coords))
+
+        if self._count + len(coords) > len(self._coords):
+            capacity = max(2 * len(self._coords), self._count + len(coords), 16)
+            self._coords = np.resize(self._coords, (capacity, self.dimensions))
+            self._is_live = np.resize(self._is_live, capacity)
+            self._tree_of = np.resize(self._tree_of, capacity)
+
+        self._coords[ids] = coords
+        self._is_live[ids] = True
+        self._tree_of[ids] = -1
+        self._objects += objects
+        self._count += len(coords)
+        self._size += len(coords)
+
+        for i, key in zip(ids.tolist(), map(tuple, coords.tolist())):
+            self._ids.setdefault(key, []).append(i)
+
+        if len(coords):
+            self.bounds[0::2] = np.minimum(self.bounds[0::2], coords.min(axis=0)).tolist()
+            self.bounds[1::2] = np.maximum(self.bounds[1::2], coords.max(axis=0)).tolist()
+
+        return ids
+
+    # Build the tree of <slot> over the points <ids>
+    def _build(self, slot, ids):
+        ids = ids[self._is_live[ids]]
+
+        if len(ids) == 0:
+            self._trees[slot] = None
+            return
+
+        self._trees[slot] = (KDTree(self._coords[ids], leaf_size=self.leaf_size), ids, 0)
+        self._tree_of[ids] = slot
+
+    # Recompute the bounding box from the trees and the buffer (after some tree was rebuilt)
+    def _update_bounds(self):
+        boxes = [tree.bounds for tree, _, _ in filter(None, self._trees)]
+
+        if self._buffer:
+            buffer = self._coords[self._buffer]
+            boxes.append(np.column_stack((buffer.min(axis=0), buffer.max(axis=0))).ravel())
+
+        self.bounds = [float('inf'), float('-inf')] * self.dimensions
+
+        if boxes:
+            boxes = np.array(boxes, dtype=np.float64)
+            self.bounds[0::2] = boxes[:, 0::2].min(axis=0).tolist()
+            self.bounds[1::2] = boxes[:, 1::2].max(axis=0).tolist()
+
+    # Insert <point> (a Point2D or a sequence of k numbers) and return its id
+    def insert(self, point):
+        objects = [point] if isinstance(point, Point2D) else [None]
+        i = int(self._store(np.array([self._query_point(point)]), objects)[0])
+        self._buffer.append(i)
+
+        if len(self._buffer) >= DYNAMIC_KD_TREE_BUFFER_SIZE:
+            # Merge the buffer with the trees of the first slots, up to the first empty one
+            slot = 0
+            while slot < len(self._trees) and self._trees[slot] is not None:
+                slot += 1
+
+            if slot == len(self._trees):
+                self._trees.append(None)
+
+            ids = np.concatenate([np.array(self._buffer, dtype=np.intp)] + [self._trees[j][1] for j in range(slot)])
+
+            for j in range(slot):
+                self._trees[j] = None
+
+            self._buffer = []
+            self._build(slot, ids)
+
+        return i
+
+    # Delete one copy of <point> (any point equal to it), ValueError if there is none. Returns its id
+    def delete(self, point):
+        key = self._query_point(point)
+
+        if key not in self._ids:
+            raise ValueError(f"{point} is not in the KD-tree")
+
+        copies = self._ids[key]
+        i = copies.pop()
+
+        if not copies:
+            del self._ids[key]
+
+        self._is_live[i] = False
+        self._size -= 1
+        slot = self._tree_of[i]
+
+        if slot == -1:
+            self._buffer.remove(i)
+        else:
+            tree, ids, deleted = self._trees[slot]
+            self._trees[slot] = (tree, ids, deleted + 1)
+
+            if deleted + 1 > DYNAMIC_KD_TREE_MAX_DELETED * len(ids):
+                self._build(slot, ids)
+
+        self._update_bounds()
+
+        return i
+
+    # Ids of the live points of <region>, [left, right, lower, upper] in 2D (a range per
+    # coordinate, as for KDTree)
+    def investigate_indices(self, region):
+        region = self._region(region)
+        found = []
+
+        for tree, ids, _ in filter(None, self._trees):
+            found.append(ids[tree.investigate_indices(region)])
+
+        buffer = np.array(self._buffer, dtype=np.intp)
+        coords = self._coords[buffer]
+        found.append(buffer[((coords >= region[0::2]) & (coords <= region[1::2])).all(axis=1)])
+
+        found = np.concatenate(found)
+
+        return found[self._is_live[found]]
+
+    # The live points of <region> as Point2D objects
+    def investigate(self, region):
+        return [self.point(i) for i in self.investigate_indices(region).tolist()]
+
+    def range_count(self, region):
+        return len(self.investigate_indices(region))
+
+    # Ids of the <k> live points nearest to <point>, from the nearest one. A tree is asked for
+    # more neighbours while deleted points hide some of its k nearest ones
+    def knn(self, point, k):
+        point = self._query_point(point)
+        candidates = [np.array(self._buffer, dtype=np.intp)]
+
+        for tree, ids, deleted in filter(None, self._trees):
+            wanted = k
+
+            while True:
+                nearest = ids[tree.knn(point, wanted)]
+                nearest = nearest[self._is_live[nearest]]
+
+                if len(nearest) >= k or wanted >= len(ids):
+                    break
+
+                wanted = min(len(ids), wanted + deleted)
+
+            candidates.append(nearest[:k])
+
+        candidates = np.concatenate(candidates)
+        candidates = candidates[self._is_live[candidates]]
+        differences = self._coords[candidates] - point
+        distances = np.einsum('ij,ij->i', differences, differences)
+
+        return candidates[np.lexsort((candidates, distances))[:max(k, 0)]]
+
 # Example usage
 if __name__ == "__main__":
     # Define points and plot them
@@ -134,8 +1155,8 @@ if __name__ == "__main__":
               Point2D(7, 8), Point2D(8, 7.5), Point2D(8.75, 2.5), Point2D(9.25, 3.5)]
     plot_points(points, [])
     
-    # Create the K2Tree
-    kdtree = KDTree(points)
+    # Create the K2Tree, with a point per leaf so that the printed tree shows every split
+    kdtree = KDTree(points, leaf_size=1)
 
     # Pretty print of tree
     kdtree.print()
@@ -19,12 +19,12 @@ def incremental_lp_solver(c, A_ub, b_ub, d):
 
         else:
             # Case 2: Calculate x*_i with updated constraints
-            # Solve the problem using d-1 variables and constraints
-            # that H'j is the join of Hj and Hi
+            # x*_{i-1} violates H_i, so x*_i lies on the boundary of H_i
+            # and the problem is solved again with the first i constraints
             combined_A_ub = np.vstack([A_ub[:i-1], A_ub[i-1]])
             combined_b_ub = np.hstack([b_ub[:i-1], b_ub[i-1]])
 
-            res = incremental_lp_solver(c, combined_A_ub, combined_b_ub, d-1)
+            res = linprog(c, A_ub=combined_A_ub, b_ub=combined_b_ub, bounds=[(0, None), (0, None)], method='highs')
             if not res.success:
                 return None, None, False
             x_star = res.x
@@ -97,3 +97,12 @@ if __name__ == "__main__":
         print("Optimal solution found:", x_opt)
     else:
         print("No solution found")
+
+    # Check against linprog on all the constraints at once, with the constraints in the order
+    # above and in one that goes through Case 2 twice
+    res = linprog(c, A_ub=A_ub, b_ub=b_ub, bounds=[(0, None), (0, None)], method='highs')
+    print("linprog optimal value: ", -res.fun)
+
+    for order in ([0, 1, 2, 3, 4], [3, 2, 1, 4, 0]):
+        opt_val, x_opt, success = incremental_lp_solver(c, np.array(A_ub)[order], np.array(b_ub)[order], d)
+        assert success and np.isclose(opt_val, res.fun)
@@ -0,0 +1,113 @@
+import numpy as np
+import helpers as helpers
+
+# Seeded point workloads for benchmarking, as (N, 2) float64 arrays
+#
+# Every distribution is generated in fixed blocks of WORKLOAD_BLOCK_SIZE points, each block with
+# its own random generator derived from the seed and the block number. So a workload is the
+# same whether it is generated at once (generate) or streamed in chunks of any size
+# (generate_chunks), and streaming 10^8 points never holds more than one chunk in memory
+WORKLOAD_BLOCK_SIZE = 2**16
+
+# Side of the square [0, WORKLOAD_SIZE)^2 that holds the points of the random distributions.
+# The degenerate ones ('grid', 'collinear') use integer coordinates instead, so that their
+# collinear points are exactly collinear in floating point
+WORKLOAD_SIZE = 50.0
+
+# Number of clusters of the 'clusters' distribution and their standard deviation
+WORKLOAD_CLUSTERS = 10
+WORKLOAD_CLUSTER_SPREAD = WORKLOAD_SIZE / 40
+
+# Uniform points in the square
+def _uniform_block(rng, start, size, n, centers):
+    return rng.uniform(0.0, WORKLOAD_SIZE, size=(size, 2))
+
+# Uniform points in the disk inscribed in the square
+def _disk_block(rng, start, size, n, centers):
+    radii = (WORKLOAD_SIZE / 2) * np.sqrt(rng.uniform(0.0, 1.0, size))
+    angles = rng.uniform(0.0, 2 * np.pi, size)
+
+    return WORKLOAD_SIZE / 2 + np.column_stack((radii * np.cos(angles), radii * np.sin(angles)))
+
+# Uniform points on the circle inscribed in the square, so every point is a hull vertex
+def _circle_block(rng, start, size, n, centers):
+    angles = rng.uniform(0.0, 2 * np.pi, size)
+
+    return WORKLOAD_SIZE / 2 + (WORKLOAD_SIZE / 2) * np.column_stack((np.cos(angles), np.sin(angles)))
+
+# Gaussian clusters around <centers>, each point in a random cluster
+def _clusters_block(rng, start, size, n, centers):
+    clusters = rng.integers(0, len(centers), size)
+
+    return centers[clusters] + rng.normal(0.0, WORKLOAD_CLUSTER_SPREAD, size=(size, 2))
+
+# The first n points of the integer grid of side ceil(sqrt(n)), row by row (not random)
+def _grid_block(rng, start, size, n, centers):
+    side = max(1, int(np.ceil(np.sqrt(n))))
+    positions = np.arange(start, start + size)
+
+    return np.column_stack((positions % side, positions // side)).astype(np.float64)
+
+# Points with integer coordinates on one line, many of them repeated
+def _collinear_block(rng, start, size, n, centers):
+    steps = rng.integers(0, max(1, n // 2), size)
+
+    return np.column_stack((steps * 2, steps * 3)).astype(np.float64)
+
+_WORKLOAD_BLOCKS = {'uniform': _uniform_block,
+                    'disk': _disk_block,
+                    'circle': _circle_block,
+                    'clusters': _clusters_block,
+                    'grid': _grid_block,
+                    'collinear': _collinear_block}
+
+# Names of the available distributions
+DISTRIBUTIONS = tuple(_WORKLOAD_BLOCKS)
+
+# Method to stream the <n> points of <distribution> in arrays of (at most) <chunk_size> points
+# With the same <seed>, the points are the same for any <chunk_size> (a seed of None draws
+# a fresh one, used for the whole stream)
+def generate_chunks(distribution, n, chunk_size=10**6, seed=None):
+    if distribution not in _WORKLOAD_BLOCKS:
+        raise ValueError(f"unknown distribution '{distribution}', expected one of {DISTRIBUTIONS}")
+
+    block_function = _WORKLOAD_BLOCKS[distribution]
+    entropy = np.random.SeedSequence(seed).entropy
+
+    centers_rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(1,)))
+    centers = centers_rng.uniform(0.1 * WORKLOAD_SIZE, 0.9 * WORKLOAD_SIZE, size=(WORKLOAD_CLUSTERS, 2))
+
+    block, block_points = -1, None
+
+    for chunk_start in range(0, n, chunk_size):
+        chunk_end = min(n, chunk_start + chunk_size)
+        chunk = np.empty((chunk_end - chunk_start, 2))
+        position = chunk_start
+
+        # Copy the blocks that overlap the chunk, generating each block only once
+        while position < chunk_end:
+            if position // WORKLOAD_BLOCK_SIZE != block:
+                block = position // WORKLOAD_BLOCK_SIZE
+                block_start = block * WORKLOAD_BLOCK_SIZE
+                rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(0, block)))
+                block_points = block_function(rng, block_start, min(WORKLOAD_BLOCK_SIZE, n - block_start), n, centers)
+
+            block_start = block * WORKLOAD_BLOCK_SIZE
+            end = min(chunk_end, block_start + len(block_points))
+            chunk[position - chunk_start:end - chunk_start] = block_points[position - block_start:end - block_start]
+            position = end
+
+        yield chunk
+
+# Method to generate the <n> points of <distribution> as one (n, 2) array
+def generate(distribution, n, seed=None):
+    points = np.empty((n, 2))
+
+    for start, chunk in zip(range(0, n, WORKLOAD_BLOCK_SIZE), generate_chunks(distribution, n, WORKLOAD_BLOCK_SIZE, seed)):
+        points[start:start + len(chunk)] = chunk
+
+    return points
+
+# Same as generate, as a PointSet
+def generate_point_set(distribution, n, seed=None):
+    return helpers.PointSet(generate(distribution, n, seed))